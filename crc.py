@@ -1,3 +1,6 @@
+from struct import iter_unpack
+import zlib, binascii
+
 CRC_MASK = { 8:0xFF, 16:0xFFFF, 32:0xFFFFFFFF }
 
 def ReflectBit(data:int, width:int) -> int:
@@ -8,6 +11,16 @@ def ReflectBit(data:int, width:int) -> int:
     data = (data >> 1)
   return reflection
 
+REFLECT8 = bytes(ReflectBit(i, 8) for i in range(256))
+
+# stdlib C implementations that work on the same register as the table engine
+
+def native_crc32(remainder:int, msg:bytes|bytearray|memoryview) -> int:
+  return zlib.crc32(msg, remainder ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+def native_crc_hqx(remainder:int, msg:bytes|bytearray|memoryview) -> int:
+  return binascii.crc_hqx(msg, remainder)
+
 class CRC:
   def __init__(
     self,
@@ -27,8 +40,16 @@ class CRC:
     self.xor = xor
     self.invertOut = invertOut
     self.topbit = (1 << (width - 1))
+    self.mask = CRC_MASK[width]
+    self.size = width // 8
+    # reflected algorithms keep the register bit-reversed and never reflect input bytes
+    self.reflected = reflectIn and reflectOut
+    self.register = ReflectBit(initial, width) if self.reflected else initial
     self.array = list()
+    self.tables = list()
+    self.zeros = list() # register operators for 2^k zero bytes, built on demand
     self.__init()
+    self.native = self.__native()
     
   def __init(self):
     for i in range(256):
@@ -38,45 +59,262 @@ class CRC:
         else: remainder = (remainder << 1)
       remainder &= CRC_MASK[self.width]
       self.array.append(remainder)
-  
-  def Run(self, msg:bytes):
-    msg = [x for x in msg]
-    remainder = self.initial
-    for byte in range(len(msg)):
-      if self.reflectIn: msg[byte] = ReflectBit(msg[byte], 8)
-      data = msg[byte] ^ (remainder >> (self.width - 8))
-      tmp = data & CRC_MASK[8]
-      remainder = self.array[tmp] ^ (remainder << 8)
-    remainder &= CRC_MASK[self.width]
-    if self.reflectOut: remainder = ReflectBit(remainder, self.width)
+    if self.reflected:
+      table = [ReflectBit(self.array[REFLECT8[i]], self.width) for i in range(256)]
+    else:
+      table = self.array
+    self.tables.append(table)
+    # slice-by-8: tables[k][i] is the register after byte i followed by k zero bytes
+    for k in range(1, 8):
+      prev = self.tables[k - 1]
+      if self.reflected:
+        table = [(prev[i] >> 8) ^ self.tables[0][prev[i] & 0xFF] for i in range(256)]
+      else:
+        top = self.width - 8
+        table = [((prev[i] << 8) & self.mask) ^ self.tables[0][prev[i] >> top] for i in range(256)]
+      self.tables.append(table)
+
+  def __native(self):
+    if self.width == 32 and self.polynomial == 0x04C11DB7 and self.reflected: return native_crc32
+    if self.width == 16 and self.polynomial == 0x1021 and not self.reflectIn and not self.reflectOut: return native_crc_hqx
+    return None
+
+  def _Update(self, remainder:int, msg:bytes|bytearray|memoryview) -> int:
+    if self.native: return self.native(remainder, msg)
+    return self._UpdateTable(remainder, msg)
+
+  def _UpdateTable(self, remainder:int, msg:bytes|bytearray|memoryview) -> int:
+    msg = memoryview(msg).cast("B")
+    if self.reflectIn and not self.reflected:
+      msg = memoryview(bytes(msg).translate(REFLECT8))
+    n = len(msg) & ~7
+    t0, t1, t2, t3, t4, t5, t6, t7 = self.tables
+    if self.reflected:
+      for (v,) in iter_unpack("<Q", msg[:n]):
+        v ^= remainder
+        remainder = t7[v & 0xFF] ^ t6[(v >> 8) & 0xFF] ^ t5[(v >> 16) & 0xFF] ^ t4[(v >> 24) & 0xFF] \
+          ^ t3[(v >> 32) & 0xFF] ^ t2[(v >> 40) & 0xFF] ^ t1[(v >> 48) & 0xFF] ^ t0[v >> 56]
+      for byte in msg[n:]:
+        remainder = t0[(remainder ^ byte) & 0xFF] ^ (remainder >> 8)
+    else:
+      shift = 64 - self.width
+      top = self.width - 8
+      mask = self.mask
+      for (v,) in iter_unpack(">Q", msg[:n]):
+        v ^= remainder << shift
+        remainder = t7[v >> 56] ^ t6[(v >> 48) & 0xFF] ^ t5[(v >> 40) & 0xFF] ^ t4[(v >> 32) & 0xFF] \
+          ^ t3[(v >> 24) & 0xFF] ^ t2[(v >> 16) & 0xFF] ^ t1[(v >> 8) & 0xFF] ^ t0[v & 0xFF]
+      for byte in msg[n:]:
+        remainder = t0[((remainder >> top) ^ byte) & 0xFF] ^ ((remainder << 8) & mask)
+    return remainder
+
+  def _Final(self, remainder:int) -> int:
+    if self.reflectOut and not self.reflected: remainder = ReflectBit(remainder, self.width)
     remainder = remainder ^ self.xor
-    if self.invertOut: remainder = self.toInt(bytes(reversed(self.toBytes(remainder))))
+    if self.invertOut: remainder = int.from_bytes(self.toBytes(remainder), byteorder="little")
     return remainder
+
+  def _Unfinal(self, crc:int) -> int:
+    if self.invertOut: crc = int.from_bytes(self.toBytes(crc), byteorder="little")
+    crc = crc ^ self.xor
+    if self.reflectOut and not self.reflected: crc = ReflectBit(crc, self.width)
+    return crc
+
+  def _Zeros(self, remainder:int, n:int) -> int:
+    # advances the register over n zero bytes with GF(2) matrices, O(log n)
+    def apply(matrix:list[int], vector:int) -> int:
+      result = 0
+      i = 0
+      while vector:
+        if vector & 1: result ^= matrix[i]
+        vector >>= 1
+        i += 1
+      return result
+    k = 0
+    while n:
+      if k == len(self.zeros):
+        if k: self.zeros.append([apply(self.zeros[k - 1], column) for column in self.zeros[k - 1]])
+        else: self.zeros.append([self._UpdateTable(1 << i, b"\0") for i in range(self.width)])
+      if n & 1: remainder = apply(self.zeros[k], remainder)
+      n >>= 1
+      k += 1
+    return remainder
+
+  def combine(self, crc_a:int, crc_b:int, len_b:int) -> int:
+    # CRC of A+B from CRC of A, CRC of B and length of B, like zlib crc32_combine
+    remainder = self._Zeros(self._Unfinal(crc_a) ^ self.register, len_b)
+    return self._Final(remainder ^ self._Unfinal(crc_b))
+
+  def Run(self, msg:bytes|bytearray|memoryview) -> int:
+    return self._Final(self._Update(self.register, msg))
+  
+  def _Many(self, frames:list[bytes]|bytes, offsets:list[int]|None=None):
+    import numpy as np
+    if offsets is None:
+      lengths = np.fromiter((len(frame) for frame in frames), dtype=np.int64, count=len(frames))
+      buffer = np.frombuffer(b"".join(frames), dtype=np.uint8)
+      offsets = np.zeros(len(frames) + 1, dtype=np.int64)
+      np.cumsum(lengths, out=offsets[1:])
+    else: # one buffer and frame boundaries: frame i is buffer[offsets[i]:offsets[i+1]]
+      offsets = np.asarray(offsets, dtype=np.int64)
+      buffer = np.frombuffer(frames, dtype=np.uint8)
+      lengths = np.diff(offsets)
+    return buffer, offsets[:-1], lengths
+
+  def _RunMany(self, buffer, starts, lengths):
+    import numpy as np
+    dtype = f"uint{self.width}"
+    if self.native: # C loop per frame is faster than vectorized lookups
+      view = memoryview(buffer)
+      crcs = (self._Final(self.native(self.register, view[start:start + length]))
+        for start, length in zip(starts.tolist(), lengths.tolist()))
+      return np.fromiter(crcs, dtype=dtype, count=len(starts))
+    # sorted by length, frames still processed at position j are always a prefix
+    order = np.argsort(-lengths, kind="stable")
+    starts = starts[order]
+    counts = np.searchsorted(-lengths[order], -np.arange(lengths.max(initial=0)), side="left")
+    table = np.array(self.tables[0], dtype=np.uint64)
+    if self.reflectIn and not self.reflected:
+      buffer = np.frombuffer(REFLECT8, dtype=np.uint8)[buffer]
+    remainder = np.full(len(starts), self.register, dtype=np.uint64)
+    top = self.width - 8
+    for j, k in enumerate(counts):
+      reg = remainder[:k]
+      byte = buffer[starts[:k] + j]
+      if self.reflected:
+        remainder[:k] = table[(reg ^ byte) & 0xFF] ^ (reg >> 8)
+      else:
+        remainder[:k] = table[((reg >> top) ^ byte) & 0xFF] ^ ((reg << 8) & self.mask)
+    if self.reflectOut and not self.reflected:
+      remainder = self._Bytes(remainder, np.frombuffer(REFLECT8, dtype=np.uint8))
+    remainder ^= self.xor
+    if self.invertOut:
+      remainder = self._Bytes(remainder)
+    crcs = np.empty(len(order), dtype=dtype)
+    crcs[order] = remainder
+    return crcs
+
+  def _Bytes(self, values, lookup=None):
+    # reverse byte order of each value, optionally mapping bytes through lookup
+    import numpy as np
+    output = np.zeros_like(values)
+    for k in range(self.size):
+      byte = (values >> (8 * k)) & 0xFF
+      if lookup is not None: byte = lookup[byte].astype(np.uint64)
+      output |= byte << (self.width - 8 - 8 * k)
+    return output
+
+  # CRCs of many frames as NumPy array,
+  # frames is a list of messages or one buffer split by N+1 offsets
+  def run_many(self, frames:list[bytes]|bytes, offsets:list[int]|None=None):
+    buffer, starts, lengths = self._Many(frames, offsets)
+    return self._RunMany(buffer, starts, lengths)
+
+  # validity flags of many frames ending with CRC as NumPy array, input as in run_many
+  def decode_many(self, frames:list[bytes]|bytes, offsets:list[int]|None=None):
+    import numpy as np
+    buffer, starts, lengths = self._Many(frames, offsets)
+    valid = lengths >= self.size
+    if not len(buffer): return valid
+    lengths = np.where(valid, lengths - self.size, 0)
+    crcs = self._RunMany(buffer, starts, lengths).astype(np.uint64)
+    received = np.zeros(len(starts), dtype=np.uint64)
+    for k in range(self.size):
+      index = np.where(valid, starts + lengths + k, 0)
+      received = (received << 8) | buffer[index].astype(np.uint64)
+    return valid & (received == crcs)
+
+  def schema(self) -> dict:
+    # parameters that define the algorithm, CRC(**schema) builds the same one
+    return {
+      "width": self.width, "polynomial": self.polynomial, "initial": self.initial,
+      "reflectIn": self.reflectIn, "reflectOut": self.reflectOut, "xor": self.xor, "invertOut": self.invertOut
+    }
+
+  def new(self, msg:bytes|bytearray|memoryview=b"") -> "CRCHash":
+    return CRCHash(self, msg)
   
   def toBytes(self, crc:int) -> bytes:
-    return crc.to_bytes(int(self.width / 8), byteorder="big")
+    return crc.to_bytes(self.size, byteorder="big")
   
   def toInt(self, crc:bytes) -> int:
-    crc = [x for x in crc]
-    if self.width == 32: return int((crc[0] << 24) + (crc[1] << 16) + (crc[2] << 8) + crc[3])
-    if self.width == 16: return int((crc[0] << 8) + crc[1])
-    if self.width == 8: return int(crc[0])
+    return int.from_bytes(crc, byteorder="big")
     
   def Decode(self, frame:bytes) -> bytes or None:
-    n = int(self.width / 8)
+    n = self.size
     if(len(frame) < n):
       return None
     msg = frame[:-n]
-    crc = frame[-n:]
-    if self.toInt(crc) == self.Run(msg):
+    if self.new(msg).digest() == frame[-n:]:
       return msg
     return None
   
   def Encode(self, msg:bytes) -> bytes:
-    crc = self.Run(msg)
-    return msg + self.toBytes(crc)
+    return msg + self.new(msg).digest()
+
+# incremental CRC with hashlib-like interface, checksums streams chunk by chunk
+class CRCHash:
+  def __init__(self, crc:CRC, msg:bytes|bytearray|memoryview=b""):
+    self.crc:CRC = crc
+    self.remainder:int = crc.register
+    self.digest_size:int = crc.size
+    if msg: self.update(msg)
+
+  def update(self, msg:bytes|bytearray|memoryview):
+    self.remainder = self.crc._Update(self.remainder, msg)
+
+  def value(self) -> int:
+    return self.crc._Final(self.remainder)
+
+  def digest(self) -> bytes:
+    return self.crc.toBytes(self.value())
+
+  def hexdigest(self) -> str:
+    return self.digest().hex()
+
+  def copy(self) -> "CRCHash":
+    other = CRCHash(self.crc)
+    other.remainder = self.remainder
+    return other
   
 crc32 = CRC(32, 0x04C11DB7, 0xFFFFFFFF, True, True, 0xFFFFFFFF, False)
 crc16_kermit = CRC(16, 0x1021, 0x0000, True, True, 0x0000, False)
 crc16_modbus = CRC(16, 0x8005, 0xFFFF, True, True, 0x0000, True)
+crc16_xmodem = CRC(16, 0x1021, 0x0000, False, False, 0x0000, False)
 crc8 = CRC(8, 0x07, 0x00, False, False, 0x00, False)
+
+if __name__ == "__main__":
+  import random, itertools
+
+  # parity of native and table engines
+  presets = {
+    "crc32": crc32,
+    "crc16_kermit": crc16_kermit,
+    "crc16_modbus": crc16_modbus,
+    "crc16_xmodem": crc16_xmodem,
+    "crc8": crc8,
+    "crc32_custom": CRC(32, 0x04C11DB7, 0x12345678, True, True, 0x00FF00FF, True),
+    "crc16_ccitt_false": CRC(16, 0x1021, 0xFFFF, False, False, 0x0000, False),
+    "crc16_custom": CRC(16, 0x1021, 0xABCD, False, False, 0x1111, True),
+    "crc16_mixed": CRC(16, 0x8005, 0x1234, True, False, 0x55AA, False),
+    "crc32_mixed": CRC(32, 0x04C11DB7, 0x12345678, False, True, 0x1, True),
+  }
+  for name, crc in presets.items():
+    for size in list(range(64)) + [255, 256, 1000, 4097]:
+      msg = random.randbytes(size)
+      table = crc._Final(crc._UpdateTable(crc.register, msg))
+      assert crc.Run(msg) == table, f"{name} mismatch for {size} bytes"
+      assert crc.Run(memoryview(msg)) == table
+      stream = crc.new()
+      for i in range(0, size, 7): stream.update(msg[i:i + 7])
+      assert stream.value() == table
+    frames = [random.randbytes(random.randrange(40)) for _ in range(200)]
+    assert list(crc.run_many(frames)) == [crc.Run(frame) for frame in frames]
+    frames = [crc.Encode(frame) for frame in frames]
+    frames[3] = b"\xFF" + frames[3]
+    valid = crc.decode_many(b"".join(frames), [0] + list(itertools.accumulate(map(len, frames))))
+    assert list(valid) == [crc.Decode(frame) is not None for frame in frames]
+    for size_a, size_b in [(0, 0), (0, 5), (5, 0), (13, 1), (100, 77), (3, 5000)]:
+      a, b = random.randbytes(size_a), random.randbytes(size_b)
+      assert crc.combine(crc.Run(a), crc.Run(b), size_b) == crc.Run(a + b)
+    print(f"{name:<18} {'native' if crc.native else 'table':<6} 0x{crc.Run(b'123456789'):0{crc.size * 2}X}")
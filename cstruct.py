@@ -1,8 +1,10 @@
-from struct import pack, unpack_from
+from struct import pack, pack_into, unpack_from, iter_unpack, Struct as Packer, error as PackError
 from enum import Enum
 from typing import Callable
 from numbers import Real
 from crc import CRC, crc32
+from concurrent.futures import ProcessPoolExecutor
+import math, os, mmap, array, bisect, time, json, hashlib, importlib, weakref
 
 """
 It allows you to transfer data between embedded devices and Python
@@ -27,18 +29,71 @@ class Type(Enum):
   # 8-bit array with the length specified in the uint16_t preamble
   bytes = "byte"
 
+NUMPY_TYPE = {
+  Type.uint8: "u1", Type.int8: "i1", Type.uint16: "u2", Type.int16: "i2",
+  Type.uint32: "u4", Type.int32: "i4", Type.uint64: "u8", Type.int64: "i8",
+  Type.float: "f4", Type.double: "f8"
+}
+
 def type_size(ctype:Type):
   if ctype.name == "uint8" or ctype.name == "int8": return 1
   if ctype.name == "uint16" or ctype.name == "int16": return 2
-  if ctype.name == "uint32" or ctype.name == "uint32" or ctype.name == "float": return 4
-  if ctype.name == "uint64" or ctype.name == "uint64" or ctype.name == "double": return 8
+  if ctype.name == "uint32" or ctype.name == "int32" or ctype.name == "float": return 4
+  if ctype.name == "uint64" or ctype.name == "int64" or ctype.name == "double": return 8
   return 0
       
+def find_zero(msg:bytes|bytearray|memoryview, offset:int, chunk:int=64) -> int:
+  # memoryview has no find(), so the terminator is searched in small copied chunks
+  while True:
+    part = bytes(msg[offset:offset + chunk])
+    if not part:
+      raise Exception("String is not terminated with null char")
+    index = part.find(b"\0")
+    if index >= 0: return offset + index
+    offset += chunk
+      
+def reserve(buffer:bytearray|memoryview, size:int):
+  if len(buffer) >= size: return
+  if isinstance(buffer, bytearray): buffer.extend(bytes(size - len(buffer)))
+  else: raise Exception(f"Buffer of {len(buffer)} bytes is too small, {size} bytes are required")
+
+def crc_into(crc:CRC, buffer:bytearray|memoryview, start:int, offset:int) -> int:
+  value = crc.Run(memoryview(buffer)[start:offset])
+  buffer[offset:offset + crc.size] = crc.toBytes(value)
+  return offset + crc.size
+
+def callback_name(fnc:Callable|None) -> str|None:
+  # module:qualname, only module-level functions can be restored from schema
+  if fnc is None: return None
+  return f"{fnc.__module__}:{fnc.__qualname__}"
+
+def callback_load(name:str|None) -> Callable|None:
+  if name is None: return None
+  module, qualname = name.split(":")
+  if "<" in qualname:
+    raise Exception(f"Callback {name} cannot be restored from schema")
+  fnc = importlib.import_module(module)
+  for attr in qualname.split("."): fnc = getattr(fnc, attr)
+  return fnc
+
+def crc_load(schema:dict|None) -> CRC|None:
+  return CRC(**schema) if schema else None
+
+def schema_fingerprint(schema:dict) -> str:
+  # sha256 of canonical JSON, the same in every process and on every machine
+  text = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+  return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
 class Endian(Enum):
   little = "<"
   big = "<"
   middle = "=2x"
 
+def check_endian(endian:Endian|None):
+  # middle padded every value on encode and never skipped padding on decode, so it has no consistent format
+  if endian is Endian.middle:
+    raise Exception("Endian middle is not supported")
+
 class Field():
   id = 0
   def __init__(
@@ -55,7 +110,7 @@ class Field():
   ) -> None:
     self.type:Type = ctype
     if not name:
-      name = "_field_" + Field.id
+      name = "_field_" + str(Field.id)
       Field.id += 1
     self.name:str = name
     self.unit:str = unit
@@ -66,22 +121,311 @@ class Field():
     self.decode:Callable[[Real], Real] = decode # TODO
     self.round:int = round_point
     
+  def schema(self) -> dict:
+    return {
+      "type": self.type.name, "name": self.name, "unit": self.unit, "length": self.length,
+      "scale": self.scale, "offset": self.offset, "round": self.round,
+      "encode": callback_name(self.encode), "decode": callback_name(self.decode)
+    }
+
+  @staticmethod
+  def from_schema(schema:dict) -> "Field":
+    return Field(Type[schema["type"]], schema["name"], schema["unit"], schema["length"], schema["scale"], schema["offset"],
+      callback_load(schema["encode"]), callback_load(schema["decode"]), schema["round"])
+
   def __str__(self):
     return f"Field {self.name}[{self.unit}]"
 
+"""
+Fixed-size fields are compiled once per endian into a single struct.Struct format,
+variable-size string and bytes fields split the layout into segments,
+formats and dtype spec can be taken from cached artefact of the same fields
+"""
+
+class Layout():
+  def __init__(self, fields:list[Field], endian:Endian, artefact:dict|None=None) -> None:
+    check_endian(endian)
+    self.endian:Endian = endian
+    self.fields:list[Field] = fields
+    self.segments:list[tuple[Packer, list[tuple]]|Field] = []
+    self.size:int = 0 # size of all fixed-size segments
+    self.fixed:bool = True # without string and bytes fields
+    self.spec:dict|None = None # cached dtype spec
+    formats = iter(artefact["formats"]) if artefact else None
+    run:list[Field] = []
+    for field in fields:
+      if field.type.name == "string" or field.type.name == "bytes":
+        self.__segment(run, formats)
+        self.segments.append(field)
+        self.fixed = False
+        run = []
+      else:
+        run.append(field)
+    self.__segment(run, formats)
+    if artefact:
+      if next(formats, None) is not None or artefact["size"] != self.size or artefact["fixed"] != self.fixed:
+        raise Exception("Layout artefact does not match fields")
+      self.spec = artefact["dtype"]
+
+  def __segment(self, fields:list[Field], formats=None):
+    if not fields: return
+    if formats is None: packer = Packer(self.endian.value + "".join(f"{field.length}{field.type.value}" for field in fields))
+    else: packer = Packer(next(formats))
+    plan = []
+    for field in fields:
+      integer = field.type.name != "float" and field.type.name != "double"
+      round_point = field.round if field.type.name == "float" else None
+      plan.append((field.name, field.length, field.scale, field.offset, integer, field.encode, field.decode, round_point))
+    self.segments.append((packer, plan))
+    self.size += packer.size
+
+  def formats(self) -> list[str]:
+    # struct.Struct format of fixed-size segments
+    return [segment[0].format for segment in self.segments if not isinstance(segment, Field)]
+
+  def dtype_spec(self, tail:int=0) -> dict:
+    # arguments of NumPy structured dtype of one record, tail bytes (e.g. crc_frame) are skipped
+    if self.spec and self.spec["itemsize"] == self.size + tail:
+      formats = [(ctype[0], tuple(ctype[1])) if isinstance(ctype, list) else ctype for ctype in self.spec["formats"]]
+      return { **self.spec, "formats": formats } # JSON has lists instead of tuples
+    if not self.fixed:
+      raise Exception("Struct with string or bytes fields cannot be mapped to NumPy array")
+    if self.endian.value not in ("<", ">", "="):
+      raise Exception(f"Endian {self.endian.name} cannot be mapped to NumPy array")
+    names, formats, offsets = [], [], []
+    offset = 0
+    for field in self.fields:
+      names.append(field.name)
+      ctype = self.endian.value + NUMPY_TYPE[field.type]
+      formats.append((ctype, (field.length,)) if field.length > 1 else ctype)
+      offsets.append(offset)
+      offset += type_size(field.type) * field.length
+    return { "names": names, "formats": formats, "offsets": offsets, "itemsize": self.size + tail }
+
+  def dtype(self, tail:int=0):
+    import numpy as np
+    return np.dtype(self.dtype_spec(tail))
+
+  @staticmethod
+  def Values(plan:list[tuple], data:dict, struct_name:str) -> list:
+    values = []
+    for name, length, scale, offset, integer, encode, _, _ in plan:
+      if name not in data:
+        raise Exception(f"Field {name} not found in struct {struct_name}")
+      value = data[name]
+      if length > 1: # is array
+        if not isinstance(value, list):
+          raise Exception(f"The value of {name} must be a list")
+        for value in value:
+          value = value * scale + offset
+          if encode: value = encode(value)
+          if integer: value = int(value)
+          values.append(value)
+      else: # is number
+        if isinstance(value, list):
+          raise Exception(f"The value of {name} must be a number")
+        value = value * scale + offset
+        if integer: value = int(value)
+        if encode: value = encode(value)
+        values.append(value)
+    return values
+
+  @staticmethod
+  def Fields(plan:list[tuple], values:tuple, data:dict):
+    i = 0
+    for name, length, scale, offset, _, _, decode, round_point in plan:
+      if length > 1: # is array
+        array = []
+        for value in values[i:i + length]:
+          value = (value - offset) / scale
+          if decode: value = decode(value)
+          if round_point is not None: value = round(value, round_point)
+          array.append(value)
+        data[name] = array
+        i += length
+      else: # is number
+        value = (values[i] - offset) / scale
+        if decode: value = decode(value)
+        if round_point is not None: value = round(value, round_point)
+        data[name] = value
+        i += 1
+
+"""
+Straight-line encoder and decoder generated from Layout and compiled with exec,
+scale and offset are inlined as constants, callbacks and packers are bound by name
+"""
+
+class Codec():
+  def __init__(self, layout:Layout, struct_name:str, crc_frame:CRC|None=None) -> None:
+    self.layout:Layout = layout
+    self.namespace:dict = {
+      "Exception": Exception, "struct_name": struct_name, "find_zero": find_zero, "crc_into": crc_into, "crc_frame": crc_frame,
+      "PackError": PackError, "check": self.__check,
+      "pack_u16": Packer(layout.endian.value + Type.uint16.value).pack_into,
+      "unpack_u16": Packer(layout.endian.value + Type.uint16.value).unpack_from
+    }
+    k = 0
+    for i, segment in enumerate(layout.segments):
+      if isinstance(segment, Field):
+        k += 1
+        continue
+      packer, plan = segment
+      self.namespace[f"pack{i}"] = packer.pack_into
+      self.namespace[f"unpack{i}"] = packer.unpack_from
+      for _, _, scale, offset, _, encoder, decoder, _ in plan:
+        self.namespace[f"scale{k}"] = scale
+        self.namespace[f"offset{k}"] = offset
+        if encoder: self.namespace[f"enc{k}"] = encoder
+        if decoder: self.namespace[f"dec{k}"] = decoder
+        k += 1
+    self.source:str = self.__source(layout, crc_frame)
+    exec(compile(self.source, f"<cstruct {struct_name}>", "exec"), self.namespace)
+    self.size:Callable[[dict], int] = self.namespace["size"]
+    self.encode_into:Callable[[dict, bytearray|memoryview, int], int] = self.namespace["encode_into"]
+    self.decode:Callable[[bytes|bytearray|memoryview, int], list] = self.namespace["decode"]
+
+  def __source(self, layout:Layout, crc_frame:CRC|None) -> str:
+    size, encode, decode = [], [], []
+    names = []
+    fixed = 0
+    for i, segment in enumerate(layout.segments):
+      if isinstance(segment, Field):
+        field = segment
+        names.append(field.name)
+        var = f"f{len(names) - 1}"
+        if field.type.name == "string":
+          size.append(f"len(bytes(data[{field.name!r}], 'utf-8')) + 1")
+          encode.append(f"raw = bytes(data[{field.name!r}], 'utf-8') + b'\\0'")
+          decode.append(f"end = find_zero(msg, offset)")
+          decode.append(f"{var} = str(msg[offset:end], 'latin-1')")
+          decode.append(f"offset = end + 1")
+        else: # bytes
+          size.append(f"len(data[{field.name!r}]) + 2")
+          encode.append(f"raw = data[{field.name!r}]")
+          encode.append(f"pack_u16(buffer, offset, len(raw))")
+          encode.append(f"offset += 2")
+          decode.append(f"n = unpack_u16(msg, offset)[0]")
+          decode.append(f"{var} = bytes(msg[offset + 2:offset + 2 + n])")
+          decode.append(f"offset += 2 + n")
+        encode.append(f"buffer[offset:offset + len(raw)] = raw")
+        encode.append(f"offset += len(raw)")
+      else:
+        packer, plan = segment
+        fixed += packer.size
+        values = []
+        decode.append(f"t = unpack{i}(msg, offset)")
+        j = 0
+        for name, length, scale, offset, integer, encoder, decoder, round_point in plan:
+          names.append(name)
+          var = f"f{len(names) - 1}"
+          k = len(names) - 1
+          item = "v" if length > 1 else f"data[{name!r}]"
+          value = item
+          if scale != 1: value = f"{value} * {self.__const(scale, k, 'scale')}"
+          if offset != 0: value = f"{value} + {self.__const(offset, k, 'offset')}"
+          if length > 1:
+            if encoder: value = f"enc{k}({value})"
+            if integer: value = f"int({value})"
+            values.append(f"*[{value} for v in data[{name!r}]]")
+          else:
+            if integer: value = f"int({value})"
+            if encoder: value = f"enc{k}({value})"
+            values.append(value)
+          item = "v" if length > 1 else f"t[{j}]"
+          value = f"({item} - {self.__const(offset, k, 'offset')})" if offset != 0 else item
+          value = f"{value} / {self.__const(scale, k, 'scale')}"
+          if decoder: value = f"dec{k}({value})"
+          if round_point is not None: value = f"round({value}, {round_point})"
+          if length > 1: decode.append(f"{var} = [{value} for v in t[{j}:{j + length}]]")
+          else: decode.append(f"{var} = {value}")
+          j += length
+        encode.append(f"pack{i}(buffer, offset, {', '.join(values)})")
+        encode.append(f"offset += {packer.size}")
+        decode.append(f"offset += {packer.size}")
+    if crc_frame:
+      fixed += crc_frame.size
+      encode.append("offset = crc_into(crc_frame, buffer, start, offset)")
+      decode.append(f"if crc_frame.Decode(msg[start:offset + {crc_frame.size}]) is None:")
+      decode.append(f"  raise Exception(\"Checksum CRC is not correct 'Frame->Struct._Decode()'\")")
+      decode.append(f"offset += {crc_frame.size}")
+    items = ", ".join(f"{name!r}: f{k}" for k, name in enumerate(names))
+    return "\n".join([
+      "def size(data):",
+      "  try:",
+      f"    return {' + '.join([str(fixed)] + size)}",
+      "  except KeyError as e:",
+      "    raise Exception(f'Field {e.args[0]} not found in struct {struct_name}')",
+      "def encode_into(data, buffer, offset):",
+      "  start = offset",
+      "  try:",
+      *["    " + line for line in encode],
+      "  except KeyError as e:",
+      "    raise Exception(f'Field {e.args[0]} not found in struct {struct_name}')",
+      "  except (TypeError, PackError):",
+      "    check(data)",
+      "    raise",
+      "  return offset",
+      "def decode(msg, offset):",
+      "  start = offset",
+      *["  " + line for line in decode],
+      f"  return [{{{items}}}, offset]",
+      ""
+    ])
+
+  def __check(self, data:dict):
+    # after failed encode, raises the same errors for list and number values as Layout.Values
+    for segment in self.layout.segments:
+      if not isinstance(segment, Field):
+        Layout.Values(segment[1], data, self.namespace["struct_name"])
+
+  def __const(self, value:Real, k:int, tag:str) -> str:
+    if isinstance(value, (int, float)) and math.isfinite(value): return repr(value)
+    return f"{tag}{k}"
+
+"""
+Layout artefacts (struct formats, record size, dtype spec) are stored as plain JSON in cache_dir
+(or CSTRUCT_CACHE) as <fingerprint>-<endian>.json, other processes with the same schema load them,
+code is never cached, codecs are always generated
+"""
+
+CACHE_VERSION = 2
+
+def load_artefact(path:str) -> dict|None:
+  try:
+    with open(path, "r", encoding="utf-8") as file:
+      artefact = json.load(file)
+  except (OSError, ValueError):
+    return None
+  return artefact if isinstance(artefact, dict) and artefact.get("version") == CACHE_VERSION else None
+
+def save_artefact(path:str, artefact:dict):
+  # written to temporary file and renamed, so concurrent workers never read half of it
+  temp = f"{path}.{os.getpid()}.tmp"
+  try:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(temp, "w", encoding="utf-8") as file:
+      json.dump(artefact, file)
+    os.replace(temp, path)
+  except OSError:
+    pass # cache is optional
+
 class Struct():
   id = 0
   codes = {}
+  compiled:dict[tuple, Codec] = {} # shared by structs with the same layout
+  cache_dir:str|None = os.environ.get("CSTRUCT_CACHE") or None
   def __init__(self, code:int|None=None, name:str|None=None, endian:Endian|None=None, crc:CRC|None=None, crc_frame:CRC|None=None, crc_auth:CRC|None=None) -> None:
     if code and name:
-      if code in Struct.codes:
-        raise Exception(f"Code {code} has been used on struct {self.structs[code]} and cannot be assigned to struct {name}")
+      # the same struct can be created again, e.g. from schema in other process
+      if code in Struct.codes and Struct.codes[code] != name:
+        raise Exception(f"Code {code} has been used on struct {Struct.codes[code]} and cannot be assigned to struct {name}")
       Struct.codes[code] = name
       if not name:
-        name = "_struct_" + Struct.id
+        name = "_struct_" + str(Struct.id)
         Struct.id += 1
     self.code:int = code
     self.name:str = name
+    check_endian(endian)
     self.endian:Endian|None = endian
     self.crc:CRC|None = crc
     self.crc_frame:CRC|None = crc_frame
@@ -89,115 +433,273 @@ class Struct():
     self.size = 0
     self.fields:list[Field] = []
     self.fields_by_name:dict[Field] = {}
+    self.layouts:dict[Endian, Layout] = {}
+    self.codecs:dict[Endian, Codec] = {}
 
   def Add(self, *fields:list[Field]):
     for field in fields:
       self.fields.append(field)
       self.fields_by_name[field.name] = field # not use
+    self.layouts = {}
+    self.codecs = {}
 
-  def _Encode(self, data:dict, endian:Endian|None=None):
+  def get_layout(self, endian:Endian|None=None) -> Layout:
     if endian is None: endian = self.endian
     if endian is None: endian = Endian.little
-    message = b""
-    for field in self.fields:
-      if field.name not in data:
-        raise Exception(f"Field {field.name} not found in struct {self.name}")
-      if field.type.name == "string":
-        message += bytes(data[field.name], "utf-8") + b"\0"
-      elif field.type.name == "bytes":
-        message += pack(endian.value + Type.uint16.value, len(data[field.name]))
-        message += data[field.name]
-      elif field.length > 1: # is array
-        if not isinstance(data[field.name], list):
-          raise Exception(f"The value of {field.name} must be a list")
-        for value in data[field.name]:
-          value = value * field.scale + field.offset
-          if field.encode: value = field.encode(value)
-          if field.type.name != "float" and field.type.name != "double":
-            value = int(value)         
-          message += pack(endian.value + field.type.value, value)
-      else: # is number
-        value = data[field.name]
-        if isinstance(value, list):
-          raise Exception(f"The value of {field.name} must be a number")
-        value = value * field.scale + field.offset
-        if field.type.name != "float" and field.type.name != "double":
-          value = int(value)
-        if field.encode: value = field.encode(value)
-        message += pack(endian.value + field.type.value, value)
-    if self.crc_frame:
-      message = self.crc_frame.Encode(message)   
-    return message
-  
-  def _Decode(self, msg:bytes, endian:Endian|None=None):
+    if endian not in self.layouts:
+      self.layouts[endian] = self.__layout(endian)
+    return self.layouts[endian]
+
+  def __layout(self, endian:Endian) -> Layout:
+    if not Struct.cache_dir:
+      return Layout(self.fields, endian)
+    fingerprint = self.fingerprint()
+    path = os.path.join(Struct.cache_dir, f"{fingerprint}-{endian.name}.json")
+    artefact = load_artefact(path)
+    if artefact and artefact.get("fingerprint") == fingerprint:
+      try:
+        return Layout(self.fields, endian, artefact)
+      except Exception:
+        pass # damaged artefact is written again
+    layout = Layout(self.fields, endian)
+    tail = self.crc_frame.size if self.crc_frame else 0
+    save_artefact(path, {
+      "version": CACHE_VERSION,
+      "fingerprint": fingerprint,
+      "struct": self.name,
+      "endian": endian.name,
+      "formats": layout.formats(),
+      "size": layout.size, # of fixed-size segments
+      "fixed": layout.fixed,
+      "dtype": layout.dtype_spec(tail) if layout.fixed and endian.value in ("<", ">", "=") else None
+    })
+    return layout
+
+  def __getstate__(self):
+    # compiled layouts and codecs are rebuilt on demand, e.g. in decode pool workers
+    state = self.__dict__.copy()
+    state["layouts"] = {}
+    state["codecs"] = {}
+    return state
+
+  def compile(self, endian:Endian|None=None) -> Codec:
     if endian is None: endian = self.endian
     if endian is None: endian = Endian.little
+    if endian not in self.codecs:
+      key = (self.name, endian, self.crc_frame, tuple((field.type, field.name, field.length, field.scale,
+        field.offset, field.encode, field.decode, field.round) for field in self.fields))
+      if key not in Struct.compiled:
+        Struct.compiled[key] = Codec(self.get_layout(endian), self.name, self.crc_frame)
+      self.codecs[endian] = Struct.compiled[key]
+    return self.codecs[endian]
+
+  def schema(self) -> dict:
+    return {
+      "code": self.code,
+      "name": self.name,
+      "endian": self.endian.name if self.endian else None,
+      "crc": self.crc.schema() if self.crc else None,
+      "crc_frame": self.crc_frame.schema() if self.crc_frame else None,
+      "crc_auth": self.crc_auth.schema() if self.crc_auth else None,
+      "fields": [field.schema() for field in self.fields]
+    }
+
+  def fingerprint(self) -> str:
+    return schema_fingerprint(self.schema())
+
+  @staticmethod
+  def from_schema(schema:dict) -> "Struct":
+    struct = Struct(schema["code"], schema["name"], Endian[schema["endian"]] if schema["endian"] else None,
+      crc_load(schema["crc"]), crc_load(schema["crc_frame"]), crc_load(schema["crc_auth"]))
+    struct.Add(*[Field.from_schema(field) for field in schema["fields"]])
+    return struct
+
+  def _Size(self, data:dict, layout:Layout) -> int:
+    size = layout.size
+    if not layout.fixed:
+      for segment in layout.segments:
+        if isinstance(segment, Field):
+          if segment.name not in data:
+            raise Exception(f"Field {segment.name} not found in struct {self.name}")
+          if segment.type.name == "string": size += len(bytes(data[segment.name], "utf-8")) + 1
+          else: size += 2 + len(data[segment.name])
+    if self.crc_frame: size += self.crc_frame.size
+    return size
+
+  def _EncodeInto(self, data:dict, buffer:bytearray|memoryview, offset:int, layout:Layout) -> int:
+    start = offset
+    for segment in layout.segments:
+      if isinstance(segment, Field):
+        field = segment
+        if field.name not in data:
+          raise Exception(f"Field {field.name} not found in struct {self.name}")
+        if field.type.name == "string":
+          value = bytes(data[field.name], "utf-8") + b"\0"
+        else: # bytes
+          value = data[field.name]
+          pack_into(layout.endian.value + Type.uint16.value, buffer, offset, len(value))
+          offset += 2
+        buffer[offset:offset + len(value)] = value
+        offset += len(value)
+      else:
+        packer, plan = segment
+        packer.pack_into(buffer, offset, *Layout.Values(plan, data, self.name))
+        offset += packer.size
     if self.crc_frame:
-      frame = self.crc_frame.Decode(frame)
-      if frame is None:
-        raise Exception("Checksum CRC is not correct 'Frame->Struct._Decode()'")
+      offset = crc_into(self.crc_frame, buffer, start, offset)
+    return offset
+
+  def _Encode(self, data:dict, endian:Endian|None=None) -> bytes:
+    layout = self.get_layout(endian)
+    buffer = bytearray(self._Size(data, layout))
+    self._EncodeInto(data, buffer, 0, layout)
+    return bytes(buffer)
+  
+  def _Decode(self, msg:bytes|bytearray|memoryview, endian:Endian|None=None, offset:int=0):
+    layout = self.get_layout(endian)
+    endian = layout.endian
+    start = offset
     data = {}
-    offset = 0
-    for field in self.fields:
-      if field.type.name == "string":
-        string = ""
-        while msg[offset]:
-          string += chr(msg[offset])
-          offset += 1
-        data[field.name] = string
-        offset += 1
-      elif field.type.name == "bytes":
-        size = unpack_from(endian.value +  Type.uint16.value, msg, offset)[0]
-        offset += 2
-        data[field.name] = msg[offset:offset + size]
-        offset += size
-      elif field.length > 1: # is array
-        data[field.name] = []
-        n = field.length
-        while n:
-          value = unpack_from(endian.value + field.type.value, msg, offset)[0]
-          value = (value - field.offset) / field.scale
-          if field.decode: value = field.decode(value)
-          if field.type.name == "float": value = round(value, field.round)
-          data[field.name].append(value)
-          offset += type_size(field.type)
-          n -= 1
-      else: # is number
-        value = unpack_from(endian.value + field.type.value, msg, offset)[0]
-        value = (value - field.offset) / field.scale
-        if field.decode: value = field.decode(value)
-        if field.type.name == "float": value = round(value, field.round)
-        data[field.name] = value
-        offset += type_size(field.type)
+    for segment in layout.segments:
+      if isinstance(segment, Field):
+        field = segment
+        if field.type.name == "string":
+          end = find_zero(msg, offset)
+          data[field.name] = str(msg[offset:end], "latin-1")
+          offset = end + 1
+        else: # bytes
+          size = unpack_from(endian.value + Type.uint16.value, msg, offset)[0]
+          offset += 2
+          data[field.name] = bytes(msg[offset:offset + size])
+          offset += size
+      else:
+        packer, plan = segment
+        Layout.Fields(plan, packer.unpack_from(msg, offset), data)
+        offset += packer.size
+    if self.crc_frame:
+      n = self.crc_frame.size
+      if self.crc_frame.Decode(msg[start:offset + n]) is None:
+        raise Exception("Checksum CRC is not correct 'Frame->Struct._Decode()'")
+      offset += n
     return [data, offset]
   
-  def Encode(self, data_list:list[dict]|dict, endian:Endian|None=None):
+  def get_size(self, data_list:list[dict]|dict, endian:Endian|None=None) -> int:
+    if isinstance(data_list, dict): data_list = [data_list]
+    codec = self.compile(endian)
+    size = sum(codec.size(data) for data in data_list)
+    if self.crc_auth: size += self.crc_auth.size
+    if self.crc: size += self.crc.size
+    return size
+
+  def encode_into(self, data_list:list[dict]|dict, buffer:bytearray|memoryview, offset:int=0, endian:Endian|None=None) -> int:
     if isinstance(data_list, dict): data_list = [data_list]
-    message = b""
+    codec = self.compile(endian)
+    reserve(buffer, offset + self.get_size(data_list, endian))
+    start = offset
     for data in data_list:
-      message += self._Encode(data, endian)
+      offset = codec.encode_into(data, buffer, offset)
     if self.crc_auth:
-      message = self.crc_auth.Encode(message) 
+      offset = crc_into(self.crc_auth, buffer, start, offset)
     if self.crc:
-      message = self.crc.Encode(message)
-    return message   
+      offset = crc_into(self.crc, buffer, start, offset)
+    return offset
+
+  def Encode(self, data_list:list[dict]|dict, endian:Endian|None=None) -> bytes:
+    buffer = bytearray()
+    self.encode_into(data_list, buffer, 0, endian)
+    return bytes(buffer)
   
-  def Decode(self, message:bytes, endian:Endian|None=None) -> list[dict]|dict:
+  def _Unwrap(self, message:bytes|bytearray|memoryview, method:str) -> memoryview:
+    message = memoryview(message).cast("B")
     if self.crc:
       message = self.crc.Decode(message)
       if message is None:
-        raise Exception("Checksum CRC is not correct 'Struct.Decode()'")
+        raise Exception(f"Checksum CRC is not correct '{method}'")
     if self.crc_auth:
       message = self.crc_auth.Decode(message)
       if message is None:
-        raise Exception("Invalid CRC authorization 'Struct.Decode()'") 
+        raise Exception(f"Invalid CRC authorization '{method}'")
+    return message
+
+  def Decode(self, message:bytes|bytearray|memoryview, endian:Endian|None=None) -> list[dict]|dict:
+    message = self._Unwrap(message, "Struct.Decode()")
+    decode = self.compile(endian).decode
     data_list = []
-    while message:
-      [data, offset] = self._Decode(message, endian)
+    offset = 0
+    while offset < len(message):
+      [data, offset] = decode(message, offset)
       data_list.append(data)
-      message = message[offset:]
     if len(data_list) == 1: return data_list[0]
     return data_list
+
+  # records of numeric-only struct as dict of NumPy arrays or pandas.DataFrame,
+  # payload is mapped onto structured dtype without copying, decode callback gets whole column
+  def decode_array(self, message:bytes|bytearray|memoryview, endian:Endian|None=None, pandas:bool=False):
+    import numpy as np
+    message = self._Unwrap(message, "Struct.decode_array()")
+    layout = self.get_layout(endian)
+    tail = self.crc_frame.size if self.crc_frame else 0
+    dtype = layout.dtype(tail)
+    if len(message) % dtype.itemsize:
+      raise Exception(f"Message size {len(message)} is not multiple of {self.name} record size {dtype.itemsize}")
+    records = np.frombuffer(message, dtype=dtype)
+    if self.crc_frame:
+      offsets = np.arange(len(records) + 1) * dtype.itemsize
+      if not self.crc_frame.decode_many(message, offsets).all():
+        raise Exception("Checksum CRC is not correct 'Frame->Struct.decode_array()'")
+    columns = {}
+    for field in layout.fields:
+      column = records[field.name]
+      integer = field.type.name != "float" and field.type.name != "double"
+      if not (integer and field.scale == 1 and field.offset == 0 and not field.decode):
+        column = (column.astype(np.float64) - field.offset) / field.scale
+        if field.decode: column = field.decode(column)
+        if field.type.name == "float": column = np.round(column, field.round)
+      columns[field.name] = column
+    if pandas:
+      import pandas as pd
+      return pd.DataFrame({ name: list(column) if column.ndim > 1 else column for name, column in columns.items() })
+    return columns
+  
+  # records of numeric-only struct from dict of NumPy arrays or pandas.DataFrame with field names,
+  # reverse of decode_array, encode callback gets whole column
+  def encode_array(self, columns:dict, endian:Endian|None=None) -> bytes:
+    import numpy as np
+    layout = self.get_layout(endian)
+    tail = self.crc_frame.size if self.crc_frame else 0
+    dtype = layout.dtype(tail)
+    records = None
+    for field in layout.fields:
+      if field.name not in columns:
+        raise Exception(f"Field {field.name} not found in struct {self.name}")
+      column = np.asarray(columns[field.name])
+      if column.dtype == object: column = np.asarray(column.tolist()) # column of lists
+      if records is None: records = np.zeros(len(column), dtype=dtype)
+      if len(column) != len(records):
+        raise Exception(f"Column {field.name} has {len(column)} values, {len(records)} expected")
+      if not len(records): continue
+      integer = field.type.name != "float" and field.type.name != "double"
+      if field.scale != 1 or field.offset != 0: column = column * field.scale + field.offset
+      if field.encode and field.length > 1: column = field.encode(column)
+      if integer and column.dtype.kind == "f": column = np.trunc(column)
+      if field.encode and field.length == 1: column = field.encode(column)
+      if integer:
+        info = np.iinfo(NUMPY_TYPE[field.type])
+        if column.min() < info.min or column.max() > info.max:
+          raise Exception(f"The value of {field.name} is out of {field.type.name} range")
+      records[field.name] = column
+    if records is None: records = np.zeros(0, dtype=dtype)
+    message = bytearray(records.tobytes())
+    if self.crc_frame and len(records):
+      raw = np.frombuffer(message, dtype=np.uint8).reshape(len(records), dtype.itemsize)
+      crcs = self.crc_frame.run_many(raw[:, :layout.size].tobytes(), np.arange(len(records) + 1) * layout.size)
+      for k in range(tail):
+        raw[:, layout.size + k] = (crcs >> (8 * (tail - 1 - k))) & 0xFF
+    if self.crc_auth:
+      message = self.crc_auth.Encode(message)
+    if self.crc:
+      message = self.crc.Encode(message)
+    return bytes(message)
   
   def __iter__(self):
     self.i = 0
@@ -221,6 +723,7 @@ class Struct():
 """
 
 class Frame():
+  instances = weakref.WeakSet() # frames built in this process, pool workers check parent schema against them
   def __init__(self, *structs:list[Struct], endian:Endian|None=Endian.little, crc:CRC|None=crc32, crc_auth:CRC|None=None) -> None:
     self.structs:list[Struct] = structs
     self.structs_by_code:dict[Struct] = {}
@@ -228,57 +731,144 @@ class Frame():
     for struct in self.structs:
       self.structs_by_code[struct.code] = struct
       self.structs_by_name[struct.name] = struct
+    check_endian(endian)
     self.endian:Endian|None = endian
     self.crc:CRC|None = crc
     self.crc_auth:CRC|None = crc_auth # is responsible for authorizations, it should be non-standard
+    self.decoders:dict[int, tuple[Struct, Callable]]|None = None
+    Frame.instances.add(self)
+
+  def __getstate__(self):
+    state = self.__dict__.copy()
+    state["decoders"] = None
+    return state
+
+  def __setstate__(self, state:dict):
+    self.__dict__.update(state)
+    Frame.instances.add(self)
+
+  def schema(self) -> dict:
+    return {
+      "endian": self.endian.name if self.endian else None,
+      "crc": self.crc.schema() if self.crc else None,
+      "crc_auth": self.crc_auth.schema() if self.crc_auth else None,
+      "structs": [struct.schema() for struct in self.structs]
+    }
+
+  def fingerprint(self) -> str:
+    return schema_fingerprint(self.schema())
+
+  @staticmethod
+  def from_schema(schema:dict) -> "Frame":
+    structs = [Struct.from_schema(struct) for struct in schema["structs"]]
+    return Frame(*structs, endian=Endian[schema["endian"]] if schema["endian"] else None,
+      crc=crc_load(schema["crc"]), crc_auth=crc_load(schema["crc_auth"]))
+
+  def get_decoders(self) -> dict[int, tuple[Struct, Callable]]:
+    # struct code -> struct and its compiled decoder
+    if self.decoders is None:
+      self.decoders = { code: (struct, struct.compile(self.endian).decode) for code, struct in self.structs_by_code.items() }
+    return self.decoders
     
-  def Encode(self, data_dict:dict) -> bytes:
-    message = b""
+  def get_size(self, data_dict:dict) -> int:
+    size = 0
+    for struct_name, data_list in data_dict.items():
+      if not isinstance(data_list, list): data_list = [data_list]
+      struct:Struct = self.structs_by_name[struct_name]
+      codec = struct.compile(self.endian)
+      size += 4 + sum(codec.size(data) for data in data_list)
+    if self.crc_auth: size += self.crc_auth.size
+    if self.crc: size += self.crc.size
+    return size
+
+  def encode_into(self, data_dict:dict, buffer:bytearray|memoryview, offset:int=0) -> int:
+    reserve(buffer, offset + self.get_size(data_dict))
+    start = offset
     for struct_name, data_list in data_dict.items():
       if not isinstance(data_list, list): data_list = [data_list]
       struct:Struct = self.structs_by_name[struct_name]
-      msg =  b"".join([struct._Encode(data, self.endian) for data in data_list])
-      message += pack(self.endian.value + Type.uint16.value, len(msg))
-      message += pack(self.endian.value + Type.uint16.value, struct.code)
-      message += msg
+      codec = struct.compile(self.endian)
+      head = offset
+      offset += 4
+      for data in data_list:
+        offset = codec.encode_into(data, buffer, offset)
+      pack_into(self.endian.value + Type.uint16.value * 2, buffer, head, offset - head - 4, struct.code)
     if self.crc_auth:
-      message = self.crc_auth.Encode(message)  
+      offset = crc_into(self.crc_auth, buffer, start, offset)
     if self.crc:
-      message = self.crc.Encode(message)
-    return message
+      offset = crc_into(self.crc, buffer, start, offset)
+    return offset
+
+  def Encode(self, data_dict:dict) -> bytes:
+    buffer = bytearray()
+    self.encode_into(data_dict, buffer)
+    return bytes(buffer)
   
-  def Decode(self, frame:bytes) -> dict:
+  def _Records(self, frame:bytes|bytearray|memoryview, method:str):
+    frame = memoryview(frame).cast("B")
     if self.crc:
       frame = self.crc.Decode(frame)
       if frame is None:
-        raise Exception("Checksum CRC is not correct 'Frame.Decode()'")
+        raise Exception(f"Checksum CRC is not correct '{method}'")
     if self.crc_auth:
       frame = self.crc_auth.Decode(frame)
       if frame is None:
-        raise Exception("Invalid CRC authorization 'Frame.Decode()'")   
-    size = 0
-    n = len(self.structs)
+        raise Exception(f"Invalid CRC authorization '{method}'")
+    decoders = self.get_decoders()
+    offset = 0
+    while offset < len(frame):
+      size, struct_code = unpack_from(self.endian.value + Type.uint16.value * 2, frame, offset)
+      offset += 4
+      if struct_code not in decoders:
+        raise Exception(f"Struct with code {struct_code} not found")
+      struct, decode = decoders[struct_code]
+      end = offset + size
+      while offset < end:
+        [data, offset] = decode(frame, offset)
+        yield struct, data
+
+  def Decode(self, frame:bytes|bytearray|memoryview) -> dict:
     data_dict = {}
-    while(n):
-      if not size:
-        size = unpack_from(self.endian.value + Type.uint16.value, frame, 0)[0]
-        struct_code = unpack_from(self.endian.value + Type.uint16.value, frame, 2)[0]
-        frame = frame[4:]
-        if struct_code not in self.structs_by_code:
-          raise Exception(f"Struct with code {struct_code} not found")
-        struct = self.structs_by_code[struct_code]
-      while(size):
-        struct:Struct
-        [data, offset] = struct._Decode(frame, self.endian)
-        if struct.name in data_dict:
-          if not isinstance(data_dict[struct.name], list): data_dict[struct.name] = [data_dict[struct.name]]
-          data_dict[struct.name].append(data)
-        else:
-          data_dict[struct.name] = data
-        frame = frame[offset:]
-        size -= offset
-      n -= 1
+    for struct, data in self._Records(frame, "Frame.Decode()"):
+      if struct.name in data_dict:
+        if not isinstance(data_dict[struct.name], list): data_dict[struct.name] = [data_dict[struct.name]]
+        data_dict[struct.name].append(data)
+      else:
+        data_dict[struct.name] = data
     return data_dict
+
+  def decode_many(self, frames:list[bytes], processes:int|None=None, threshold:int=10000, pandas:bool=False) -> dict[str, dict[str, list]]:
+    # records of many frames grouped per struct as columns {struct: {field: values}},
+    # above threshold frames are split across a process pool
+    if len(frames) > threshold and processes != 1:
+      workers = processes or os.cpu_count() or 1
+      size = -(-len(frames) // (workers * 4))
+      chunks = [[bytes(frame) for frame in frames[i:i + size]] for i in range(0, len(frames), size)]
+      with ProcessPoolExecutor(workers) as executor:
+        # workers get frame as schema, see worker_frame()
+        schema = self.schema()
+        fingerprint = schema_fingerprint(schema)
+        parts = list(executor.map(decode_frames, [schema] * len(chunks), chunks, [fingerprint] * len(chunks)))
+    else:
+      parts = [decode_frames(self, frames)]
+    columns = {}
+    for part in parts:
+      for struct_name, struct_columns in part.items():
+        if struct_name not in columns:
+          columns[struct_name] = struct_columns
+          continue
+        for name, values in struct_columns.items():
+          columns[struct_name][name].extend(values)
+    if pandas:
+      import pandas as pd
+      return { struct_name: pd.DataFrame(struct_columns) for struct_name, struct_columns in columns.items() }
+    return columns
+
+  def decode_stream(self, buffer:bytes|bytearray|memoryview, processes:int|None=None, threshold:int=10000,
+    pandas:bool=False, max_size:int=65536) -> dict[str, dict[str, list]]:
+    # records of back-to-back frames, e.g. whole capture, as in decode_many
+    frames = FrameStreamDecoder(self, max_size).split(buffer)
+    return self.decode_many(frames, processes, threshold, pandas)
   
   def get_struct(self, tag:int|str) -> dict:
     if type(tag) is int:
@@ -298,6 +888,247 @@ class Frame():
     else:
       raise StopIteration
 
+WORKER_FRAMES:dict[str, Frame] = {} # frames used in pool worker, by fingerprint
+
+def worker_frame(schema:dict, fingerprint:str) -> Frame:
+  # frame built by worker's own imports with the same struct codes must have the same fingerprint,
+  # otherwise worker code disagrees with parent, without such frame it is rebuilt from schema
+  codes = { struct["code"] for struct in schema["structs"] }
+  local = [frame for frame in list(Frame.instances) if set(frame.structs_by_code) == codes]
+  for frame in local:
+    if frame.fingerprint() == fingerprint: return frame
+  if local:
+    raise Exception(f"Frame schema {local[0].fingerprint()} in worker differs from expected {fingerprint}")
+  return Frame.from_schema(schema)
+
+def decode_frames(frame:Frame|dict, frames:list[bytes], fingerprint:str|None=None) -> dict[str, dict[str, list]]:
+  # module-level, so it can be sent to process pool workers, there frame comes as schema
+  if isinstance(frame, dict):
+    if fingerprint not in WORKER_FRAMES:
+      WORKER_FRAMES[fingerprint] = worker_frame(frame, fingerprint)
+    frame = WORKER_FRAMES[fingerprint]
+  columns = {}
+  for raw in frames:
+    for struct, data in frame._Records(raw, "Frame.decode_many()"):
+      if struct.name not in columns:
+        columns[struct.name] = { field.name: [] for field in struct.fields }
+      struct_columns = columns[struct.name]
+      for name, value in data.items():
+        struct_columns[name].append(value)
+  return columns
+
+"""
+Frames fed in arbitrary chunks, e.g. from SerialPort.read(),
+frame end is found by walking |size|type| headers and testing the trailing CRC after each segment,
+on unknown struct code, oversized or undecodable frame one byte is dropped and search starts again
+"""
+
+class FrameStreamDecoder():
+  def __init__(self, frame:Frame, max_size:int=65536) -> None:
+    if not frame.crc:
+      raise Exception("Frame without CRC cannot be decoded from stream")
+    self.frame:Frame = frame
+    self.max_size:int = max_size
+    self.buffer:bytearray = bytearray()
+    self.start:int = 0 # beginning of the current frame in buffer
+    self.dropped:int = 0 # bytes skipped during resynchronisation
+    self.__begin()
+
+  def __begin(self):
+    self.pos:int = self.start # end of already parsed segments
+    self.segments:int = 0
+    self.hash = self.frame.crc.new()
+
+  def __resync(self):
+    self.start += 1
+    self.dropped += 1
+    self.__begin()
+
+  def __next(self, decode:bool=True) -> dict|bytes|None:
+    na = self.frame.crc_auth.size if self.frame.crc_auth else 0
+    nc = self.frame.crc.size
+    while True:
+      end = len(self.buffer)
+      if self.segments:
+        if self.pos + na + nc > end: return None
+        view = memoryview(self.buffer)
+        tail = self.hash.copy()
+        tail.update(view[self.pos:self.pos + na])
+        if tail.digest() == view[self.pos + na:self.pos + na + nc]:
+          if decode:
+            try:
+              data = self.frame.Decode(view[self.start:self.pos + na + nc])
+            except Exception:
+              data = None
+          else:
+            data = bytes(view[self.start:self.pos + na + nc])
+          view = None
+          if data is None:
+            self.__resync()
+            continue
+          self.start = self.pos + na + nc
+          self.__begin()
+          return data
+        view = None
+      if self.pos + 4 > end: return None
+      size, code = unpack_from(self.frame.endian.value + Type.uint16.value * 2, self.buffer, self.pos)
+      if code not in self.frame.structs_by_code or self.pos + 4 + size + na + nc - self.start > self.max_size:
+        self.__resync()
+        continue
+      if self.pos + 4 + size > end: return None
+      self.hash.update(memoryview(self.buffer)[self.pos:self.pos + 4 + size])
+      self.pos += 4 + size
+      self.segments += 1
+
+  def feed(self, chunk:bytes|bytearray|memoryview, decode:bool=True) -> list[dict]|list[bytes]:
+    self.buffer += chunk
+    frames = []
+    while (data := self.__next(decode)) is not None:
+      frames.append(data)
+    if self.start > len(self.buffer) // 2:
+      del self.buffer[:self.start]
+      self.pos -= self.start
+      self.start = 0
+    return frames
+
+  def split(self, chunk:bytes|bytearray|memoryview) -> list[bytes]:
+    # raw frames with valid CRC, without decoding
+    return self.feed(chunk, False)
+
+  def reset(self):
+    self.buffer = bytearray()
+    self.start = 0
+    self.__begin()
+
+"""
+Capture file is a log of |length-uint32|frame| records,
+sidecar index file (.idx) holds |offset-uint64|time-uint32| of each record,
+reader maps the log with mmap and decodes only requested records
+"""
+
+def frame_time(data_dict:dict, time_field:str="time") -> int:
+  # time of the first record having time_field, current time otherwise
+  for data_list in data_dict.values():
+    data = data_list[0] if isinstance(data_list, list) else data_list
+    if time_field in data: return int(data[time_field])
+  return int(time.time())
+
+class CaptureWriter():
+  def __init__(self, path:str, frame:Frame, time_field:str="time") -> None:
+    self.path:str = path
+    self.frame:Frame = frame
+    self.time_field:str = time_field
+    self.log = open(path, "ab")
+    self.index = open(path + ".idx", "ab")
+    self.offset:int = os.path.getsize(path)
+
+  def write(self, data_dict:dict, timestamp:int|None=None):
+    if timestamp is None: timestamp = frame_time(data_dict, self.time_field)
+    self.write_raw(self.frame.Encode(data_dict), timestamp)
+
+  def write_raw(self, message:bytes|bytearray|memoryview, timestamp:int):
+    self.log.write(pack("<I", len(message)))
+    self.log.write(message)
+    self.index.write(pack("<QI", self.offset, timestamp))
+    self.offset += 4 + len(message)
+
+  def flush(self):
+    self.log.flush()
+    self.index.flush()
+
+  def close(self):
+    self.log.close()
+    self.index.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+class CaptureReader():
+  def __init__(self, path:str, frame:Frame, time_field:str="time") -> None:
+    self.path:str = path
+    self.frame:Frame = frame
+    self.time_field:str = time_field
+    self.file = open(path, "rb")
+    size = os.path.getsize(path)
+    self.map:mmap.mmap|None = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+    self.offsets = array.array("Q")
+    self.times = array.array("I") # times are expected to be non-decreasing
+    if os.path.isfile(path + ".idx"): self.load_index()
+    else: self.rebuild_index()
+
+  def load_index(self):
+    # index is rebuilt when its last record doesn't end at the end of log, e.g. after crash between writes
+    with open(self.path + ".idx", "rb") as file:
+      raw = file.read()
+    for offset, timestamp in iter_unpack("<QI", raw[:len(raw) - len(raw) % 12]):
+      self.offsets.append(offset)
+      self.times.append(timestamp)
+    size = len(self.map) if self.map else 0
+    end = 0
+    if self.offsets:
+      offset = self.offsets[-1]
+      end = offset + 4 + unpack_from("<I", self.map, offset)[0] if offset + 4 <= size else size + 1
+    if end != size: self.rebuild_index()
+
+  def rebuild_index(self):
+    # walks length prefixes, decodes each frame once to get its time
+    self.offsets = array.array("Q")
+    self.times = array.array("I")
+    offset = 0
+    size = len(self.map) if self.map else 0
+    while offset + 4 <= size:
+      length = unpack_from("<I", self.map, offset)[0]
+      if offset + 4 + length > size: break
+      self.offsets.append(offset)
+      data_dict = self.frame.Decode(memoryview(self.map)[offset + 4:offset + 4 + length])
+      self.times.append(frame_time(data_dict, self.time_field))
+      offset += 4 + length
+    with open(self.path + ".idx", "wb") as file:
+      for offset, timestamp in zip(self.offsets, self.times):
+        file.write(pack("<QI", offset, timestamp))
+
+  def __len__(self) -> int:
+    return len(self.offsets)
+
+  def raw(self, i:int) -> memoryview:
+    # view into mapped log, valid until close()
+    offset = self.offsets[i]
+    length = unpack_from("<I", self.map, offset)[0]
+    return memoryview(self.map)[offset + 4:offset + 4 + length]
+
+  def __getitem__(self, i:int) -> dict:
+    return self.frame.Decode(self.raw(i))
+
+  def find(self, start:int|None=None, stop:int|None=None) -> range:
+    # record indexes with start <= time < stop
+    first = 0 if start is None else bisect.bisect_left(self.times, start)
+    last = len(self.times) if stop is None else bisect.bisect_left(self.times, stop)
+    return range(first, last)
+
+  def read(self, start:int|None=None, stop:int|None=None) -> list[dict]:
+    return [self[i] for i in self.find(start, stop)]
+
+  def read_many(self, start:int|None=None, stop:int|None=None, **kwargs) -> dict[str, dict[str, list]]:
+    # columns as in Frame.decode_many
+    return self.frame.decode_many([self.raw(i) for i in self.find(start, stop)], **kwargs)
+
+  def close(self):
+    # map can't be closed while views from raw() exist, then it's unmapped when the last one is released
+    if self.map:
+      try: self.map.close()
+      except BufferError: pass
+      self.map = None
+    self.file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
 if __name__ == "__main__":
 
   class Modem(Struct):
@@ -393,6 +1224,7 @@ if __name__ == "__main__":
   # convert message to data
   data = fr.Decode(message)
   print(data)
+  frame_data = data
   
   xyz = Struct(endian=Endian.little, crc=crc32)
   xyz.Add(
@@ -408,3 +1240,18 @@ if __name__ == "__main__":
   print(message)
   data = xyz.Decode(message)
   print(data)
+
+
+  # interpreted layout vs generated codec
+  import timeit
+  for struct in fr:
+    record = frame_data[struct.name]
+    if isinstance(record, list): record = record[0]
+    codec = struct.compile(fr.endian)
+    msg = struct._Encode(record, fr.endian)
+    buffer = bytearray(len(msg))
+    n = 20000
+    print(f"{struct.name:<8} encode {timeit.timeit(lambda: struct._Encode(record, fr.endian), number=n) / n * 1e6:.2f}us"
+      f" -> {timeit.timeit(lambda: codec.encode_into(record, buffer, 0), number=n) / n * 1e6:.2f}us"
+      f" | decode {timeit.timeit(lambda: struct._Decode(msg, fr.endian), number=n) / n * 1e6:.2f}us"
+      f" -> {timeit.timeit(lambda: codec.decode(msg, 0), number=n) / n * 1e6:.2f}us")
@@ -0,0 +1,177 @@
+import argparse, platform, sys, time
+from datetime import datetime
+from cstruct import Struct, Field, Type, Frame, Endian
+import crc
+from my import file
+
+"""
+Throughput of cstruct encode/decode and crc presets in records/s and MB/s,
+results are saved to JSON and compared with stored baseline to flag regressions
+python cstruct_bench.py -o bench.json -b baseline.json
+https://github.com/Xaeian/
+2026-10-18 12:00:00
+"""
+
+class Modem(Struct):
+  def __init__(self, code:int) -> None:
+    super().__init__(code, "modem")
+    self.Add(
+      Field(Type.uint8, "uid", length=12),
+      Field(Type.string, "str"),
+      Field(Type.float, "sigPower", "dbm"),
+      Field(Type.float, "gpsLatitude", "°", scale=100000),
+      Field(Type.float, "gpsLongitude", "°", scale=100000)
+    )
+
+class SDM230(Struct):
+  def __init__(self, code:int) -> None:
+    super().__init__(code, "sdm230")
+    self.Add(
+      Field(Type.uint32, "time", "s"),
+      Field(Type.bytes, "bytes"),
+      Field(Type.float, "voltage", "V"),
+      Field(Type.float, "current", "A"),
+      Field(Type.float, "activePower", "W"),
+      Field(Type.float, "apparentPower", "VA"),
+      Field(Type.float, "reactivePower", "VAr"),
+      Field(Type.float, "powerFactor"),
+      Field(Type.float, "phaseAngle", "°"),
+      Field(Type.float, "frequency", "Hz"),
+      Field(Type.float, "importActiveEnergy", "kWh"),
+      Field(Type.float, "exportActiveEnergy", "kWh"),
+      Field(Type.float, "importReactiveEnergy", "kVArh"),
+      Field(Type.float, "exportReactiveEnergy", "kVArh")
+    )
+
+class Wide(Struct):
+  def __init__(self, code:int) -> None:
+    super().__init__(code, "wide")
+    self.Add(
+      Field(Type.uint32, "time", "s"),
+      Field(Type.float, "samples", length=256),
+      Field(Type.double, "spectrum", length=64, scale=10)
+    )
+
+class Small(Struct):
+  def __init__(self, code:int) -> None:
+    super().__init__(code, "small")
+    self.Add(*[Field(Type.bytes, f"tag{i}") for i in range(16)])
+
+RECORDS = {
+  "modem": {
+    "uid": [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
+    "str": "Test",
+    "sigPower": -67,
+    "gpsLatitude": 23.2,
+    "gpsLongitude": 15.6,
+  },
+  "sdm230": {
+    "time": 1697300000,
+    "bytes": b"xy\12\13\14\15",
+    "voltage": 230.1,
+    "current": 2.5,
+    "activePower": 575.2,
+    "apparentPower": 580,
+    "reactivePower": 12.5,
+    "powerFactor": 0.99,
+    "phaseAngle": 1.2,
+    "frequency": 50,
+    "importActiveEnergy": 1234.5,
+    "exportActiveEnergy": 0,
+    "importReactiveEnergy": 12.3,
+    "exportReactiveEnergy": 0.1,
+  },
+  "wide": {
+    "time": 1697300000,
+    "samples": [i * 0.25 for i in range(256)],
+    "spectrum": [i * 0.5 for i in range(64)],
+  },
+  "small": { f"tag{i}": bytes([i]) * (i % 4) for i in range(16) },
+}
+
+def measure(fnc, min_time:float=0.2, repeat:int=3) -> float:
+  # best time of one call, calls are repeated until min_time elapses
+  number = 1
+  while True:
+    start = time.perf_counter()
+    for _ in range(number): fnc()
+    elapsed = time.perf_counter() - start
+    if elapsed >= min_time: break
+    number *= 2
+  best = elapsed / number
+  for _ in range(repeat - 1):
+    start = time.perf_counter()
+    for _ in range(number): fnc()
+    best = min(best, (time.perf_counter() - start) / number)
+  return best
+
+def result(seconds:float, records:int, size:int) -> dict:
+  return {
+    "seconds": seconds,
+    "records_s": records / seconds,
+    "mb_s": size / seconds / 1e6,
+  }
+
+def run(sizes:list[int], min_time:float) -> dict:
+  results = {}
+  frame = Frame(Modem(1), SDM230(2), Wide(3), Small(4), endian=Endian.little)
+  for struct in frame:
+    record = RECORDS[struct.name]
+    for n in sizes:
+      records = [record] * n
+      message = struct.Encode(records)
+      results[f"struct.encode/{struct.name}/{n}"] = result(measure(lambda: struct.Encode(records), min_time), n, len(message))
+      results[f"struct.decode/{struct.name}/{n}"] = result(measure(lambda: struct.Decode(message), min_time), n, len(message))
+      if len(message) > 0xFFFF: continue # segment size in frame is uint16
+      data = { struct.name: records }
+      message = frame.Encode(data)
+      results[f"frame.encode/{struct.name}/{n}"] = result(measure(lambda: frame.Encode(data), min_time), n, len(message))
+      results[f"frame.decode/{struct.name}/{n}"] = result(measure(lambda: frame.Decode(message), min_time), n, len(message))
+  presets = { name: value for name, value in vars(crc).items() if isinstance(value, crc.CRC) }
+  for name, preset in presets.items():
+    for size in (64, 4096, 65536):
+      message = bytes(i & 0xFF for i in range(size))
+      results[f"crc/{name}/{size}"] = result(measure(lambda: preset.Run(message), min_time), 1, size)
+  return results
+
+def compare(results:dict, baseline:dict, tolerance:float) -> list[str]:
+  regressions = []
+  for key, base in baseline.items():
+    if key not in results: continue
+    ratio = results[key]["records_s"] / base["records_s"]
+    flag = ""
+    if ratio < 1 - tolerance:
+      flag = " REGRESSION"
+      regressions.append(key)
+    print(f"{key:<36} {base['records_s']:>14.1f} -> {results[key]['records_s']:>14.1f} rec/s {ratio:>6.2f}x{flag}")
+  return regressions
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="cstruct and crc throughput benchmark")
+  parser.add_argument("-o", "--output", default="bench.json", help="JSON file for results")
+  parser.add_argument("-b", "--baseline", default="", help="JSON file with results to compare with")
+  parser.add_argument("-t", "--tolerance", type=float, default=0.1, help="allowed slowdown as fraction")
+  parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[1, 100, 10000], help="records per message")
+  parser.add_argument("--min-time", type=float, default=0.2, help="minimal time of one measurement [s]")
+  args = parser.parse_args()
+  results = run(args.sizes, args.min_time)
+  for key, value in results.items():
+    print(f"{key:<36} {value['records_s']:>14.1f} rec/s {value['mb_s']:>10.2f} MB/s")
+  file.save_json_prettie(args.output, {
+    "meta": {
+      "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+      "python": sys.version.split()[0],
+      "platform": platform.platform(),
+      "sizes": args.sizes,
+    },
+    "results": results,
+  })
+  if args.baseline:
+    baseline = file.load_json(args.baseline)
+    if not baseline:
+      print(f"Baseline {args.baseline} not found")
+      sys.exit(2)
+    regressions = compare(results, baseline["results"], args.tolerance)
+    if regressions:
+      print(f"{len(regressions)} regressions over {args.tolerance:.0%} tolerance")
+      sys.exit(1)
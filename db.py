@@ -1,12 +1,18 @@
 from abc import abstractmethod
 import psycopg2, pymysql, sqlite3
+from psycopg2.extras import execute_values
 from psycopg2._psycopg import connection as PostgresConnection, cursor as PostgresCursor
 from pymysql import Connection as MysqlConnection
-from pymysql.cursors import Cursor as MysqlCursor
+from pymysql.cursors import SSCursor
+from pymysql.constants import FIELD_TYPE
 from sqlite3 import Connection as SqliteConnection, Cursor as SqliteCursor
-from datetime import datetime
+from datetime import datetime, date, timezone
 from enum import Enum
-import html, os
+from contextlib import contextmanager
+from collections import deque, OrderedDict
+from typing import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+import html, os, threading, time, itertools, io, csv, re, asyncio, functools, queue, atexit
 from my import split_sql
 
 class DatabaseType(str, Enum):
@@ -20,56 +26,588 @@ def tuple_to_list(data):
   else:
     return data
 
+STREAM_ID = itertools.count()
+PARAM_TYPES = (bool, int, float, str, bytes, bytearray, memoryview, date)
+
+def infer_dtype(values:tuple) -> str:
+  # NumPy dtype of column from its values, None is skipped
+  kinds = { type(value) for value in values if value is not None }
+  if not kinds: return "object"
+  if kinds <= {bool}: return "bool"
+  if kinds <= {int}: return "int64"
+  if kinds <= {int, float}: return "float64"
+  if all(issubclass(kind, datetime) for kind in kinds): return "datetime64[us]"
+  if kinds <= {date}: return "datetime64[D]"
+  return "object"
+
+def join_dtype(a:str, b:str) -> str:
+  # dtype holding values of both
+  if a == b: return a
+  if {a, b} == {"int64", "float64"}: return "float64"
+  if a.startswith("datetime64") and b.startswith("datetime64"): return "datetime64[us]"
+  return "object"
+
+def column_array(values:tuple, dtype:str|None=None):
+  # typed NumPy array of column values, integers with None become float with NaN, booleans with None object
+  import numpy as np
+  if dtype is None: dtype = infer_dtype(values)
+  if dtype == "bool" and any(value is None for value in values): dtype = "object"
+  try:
+    if dtype.startswith("datetime64"):
+      if any(value is not None and getattr(value, "tzinfo", None) for value in values):
+        values = [value.astimezone(timezone.utc).replace(tzinfo=None) if value is not None else None for value in values]
+      return np.array(values, dtype=dtype)
+    return np.fromiter(values, dtype=dtype, count=len(values))
+  except (TypeError, ValueError, OverflowError):
+    if dtype.startswith(("int", "float")):
+      try: return np.fromiter((np.nan if value is None else value for value in values), dtype="float64", count=len(values))
+      except (TypeError, ValueError): pass
+    return np.fromiter(values, dtype=object, count=len(values))
+
+STATEMENT_ID = itertools.count()
+PARAM_RE = re.compile(r"%s|%%")
+# table list of clause ends on next keyword, parenthesis or semicolon
+TABLES_RE = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE|TRUNCATE)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?(?:ONLY\s+)?(.*?)"
+  r"(?=\b(?:WHERE|JOIN|INNER|LEFT|RIGHT|FULL|CROSS|NATURAL|ON|USING|GROUP|ORDER|LIMIT|HAVING|UNION|EXCEPT|INTERSECT"
+  r"|SET|VALUES|SELECT|RETURNING|WINDOW|OFFSET|FETCH|FOR)\b|[();]|$)", re.IGNORECASE | re.DOTALL)
+TABLE_RE = re.compile(r"\s*((?:[`\"\[]?[\w$]+[`\"\]]?\.)*[`\"\[]?[\w$]+[`\"\]]?)(?:\s+(?:AS\s+)?[\w$]+)?\s*$", re.IGNORECASE)
+
+def normalize_sql(sql:str) -> str:
+  # whitespace outside quoted text is collapsed, so formatting does not split cache entries
+  sql = re.sub(r"'(?:[^']|'')*'|\s+", lambda match: match.group(0) if match.group(0)[0] == "'" else " ", sql)
+  return sql.strip().rstrip(";").rstrip()
+
+def table_name(name:str) -> str:
+  # cache key of table, without schema and quotes
+  return name.split(".")[-1].strip().strip("`\"[]").lower()
+
+def sql_tables(sql:str) -> set[str]|None:
+  # names of tables referenced by query, without schema and quotes, None if some cannot be parsed
+  tables = set()
+  for clause in TABLES_RE.findall(sql):
+    for item in clause.split(","): # FROM a, b x, c AS y
+      match = TABLE_RE.match(item)
+      if not match: return None
+      tables.add(table_name(match.group(1)))
+  return tables
+
+def numbered_params(sql:str) -> str:
+  # %s placeholders as $1, $2... for PREPARE, %% is literal % as in psycopg2 queries with params
+  number = itertools.count(1)
+  return PARAM_RE.sub(lambda match: f"${next(number)}" if match.group(0) == "%s" else "%", sql)
+
+def table_rows(rows, columns:list[str]|None=None) -> tuple:
+  # rows and columns from list of rows or pandas DataFrame, NaN/NaT of DataFrame become None
+  if hasattr(rows, "itertuples"):
+    if columns is None: columns = [str(name) for name in rows.columns]
+    rows = rows.astype(object).where(rows.notna(), None).itertuples(index=False, name=None)
+  return rows, columns
+
+class CsvStream(io.TextIOBase):
+  # rows as CSV text produced on read(), e.g. for COPY FROM STDIN, whole data is never in memory
+  def __init__(self, rows, encode:Callable, chunk:int=1000):
+    self.rows = iter(rows)
+    self.encode:Callable = encode
+    self.chunk:int = chunk
+    self.buffer = io.StringIO()
+    self.writer = csv.writer(self.buffer, lineterminator="\n")
+    self.text = ""
+
+  def __encode(self, value):
+    # None as \N, so it differs from empty string, COPY uses NULL '\N',
+    # bytes as bytea hex, csv.writer would write their repr
+    if value is None: return "\\N"
+    value = self.encode(value)
+    if isinstance(value, (bytes, bytearray, memoryview)): return "\\x" + bytes(value).hex()
+    return value
+
+  def readable(self) -> bool:
+    return True
+
+  def read(self, size:int=-1) -> str:
+    while size < 0 or len(self.text) < size:
+      batch = list(itertools.islice(self.rows, self.chunk))
+      if not batch: break
+      self.writer.writerows(map(self.__encode, row) for row in batch)
+      self.text += self.buffer.getvalue()
+      self.buffer.seek(0)
+      self.buffer.truncate()
+    if size < 0: size = len(self.text)
+    text, self.text = self.text[:size], self.text[size:]
+    return text
+
+# ----------------------------------------------------------------------------- Pool
+
+"""
+Connections are reused between queries, one thread holds one connection,
+nested checkouts in the same thread (e.g. get_row -> get_array) get the same connection,
+on release open transaction is rolled back and connection returns to idle stack
+"""
+
+class ConnectionPool:
+  def __init__(
+    self,
+    connect:Callable,
+    ping:Callable|None=None,
+    min_size:int=1,
+    max_size:int=5,
+    idle_timeout:float=300, # idle connections above min_size are closed after [s]
+    check_after:float=5, # health check of connections idle longer than [s]
+    timeout:float=30 # waiting for free connection [s]
+  ):
+    self.connect:Callable = connect
+    self.ping:Callable|None = ping
+    self.min_size:int = min_size
+    self.max_size:int = max_size
+    self.idle_timeout:float = idle_timeout
+    self.check_after:float = check_after
+    self.timeout:float = timeout
+    self.pid:int = os.getpid()
+    self.size:int = 0 # opened connections, idle and checked out
+    self.idle:deque[tuple] = deque() # (conn, release time)
+    self.cond = threading.Condition()
+    self.local = threading.local()
+    for _ in range(min_size):
+      self.idle.append((self.connect(), time.monotonic()))
+      self.size += 1
+
+  def __close(self, conn):
+    try: conn.close()
+    except Exception: pass
+
+  def __evict(self):
+    # under lock, oldest idle connections are at the left
+    now = time.monotonic()
+    while self.idle and self.size > self.min_size and now - self.idle[0][1] > self.idle_timeout:
+      conn, _ = self.idle.popleft()
+      self.size -= 1
+      self.__close(conn)
+
+  def __healthy(self, conn, idle:float) -> bool:
+    if not self.ping or idle < self.check_after: return True
+    try: return bool(self.ping(conn))
+    except Exception: return False
+
+  def acquire(self, dedicated:bool=False):
+    # dedicated connection is not shared with nested checkouts of the thread, e.g. for open cursor
+    if not dedicated and getattr(self.local, "depth", 0):
+      self.local.depth += 1
+      return self.local.conn
+    deadline = time.monotonic() + self.timeout
+    while True:
+      conn = None
+      with self.cond:
+        self.__evict()
+        while not self.idle and self.size >= self.max_size:
+          remaining = deadline - time.monotonic()
+          if remaining <= 0:
+            raise TimeoutError(f"No free connection in pool of {self.max_size} after {self.timeout}s")
+          self.cond.wait(remaining)
+        if self.idle:
+          conn, released = self.idle.pop() # most recently used
+        else:
+          self.size += 1
+      if conn is None:
+        try: conn = self.connect()
+        except Exception:
+          with self.cond:
+            self.size -= 1
+            self.cond.notify()
+          raise
+      elif not self.__healthy(conn, time.monotonic() - released):
+        self.__discard(conn)
+        continue
+      if dedicated: return conn
+      self.local.conn = conn
+      self.local.depth = 1
+      return conn
+
+  def __discard(self, conn):
+    self.__close(conn)
+    with self.cond:
+      self.size -= 1
+      self.cond.notify()
+
+  def release(self, conn, broken:bool=False, dedicated:bool=False):
+    if not dedicated:
+      self.local.depth -= 1
+      if self.local.depth: return
+      self.local.conn = None
+    if not broken:
+      try: conn.rollback()
+      except Exception: broken = True
+    if broken:
+      self.__discard(conn)
+      return
+    with self.cond:
+      self.idle.append((conn, time.monotonic()))
+      self.__evict()
+      self.cond.notify()
+
+  @contextmanager
+  def connection(self, dedicated:bool=False):
+    conn = self.acquire(dedicated)
+    try:
+      yield conn
+    finally:
+      self.release(conn, dedicated=dedicated)
+
+  def close(self):
+    # idle connections are closed, checked out ones are closed on release
+    with self.cond:
+      while self.idle:
+        conn, _ = self.idle.pop()
+        self.size -= 1
+        self.__close(conn)
+      self.min_size = 0
+      self.idle_timeout = -1
+
+"""
+Statements prepared on one connection, least recently used is dropped over size,
+connection is used by one thread at a time, so there is no lock
+"""
+
+class StatementCache:
+  def __init__(self, size:int):
+    self.size:int = size
+    self.statements:OrderedDict[str, str] = OrderedDict() # sql -> statement name
+
+  def get(self, sql:str) -> str|None:
+    name = self.statements.get(sql)
+    if name is not None: self.statements.move_to_end(sql)
+    return name
+
+  def add(self, sql:str, name:str) -> str|None:
+    # returns name of evicted statement
+    self.statements[sql] = name
+    if len(self.statements) > self.size:
+      return self.statements.popitem(last=False)[1]
+    return None
+
+"""
+Read-through cache of query results, entries expire after ttl, least recently used is dropped over max_size,
+write touching a table drops entries of queries that referenced it
+"""
+
+class ResultCache:
+  def __init__(self, max_size:int=256, ttl:float=60):
+    self.max_size:int = max_size
+    self.ttl:float = ttl
+    self.entries:OrderedDict[tuple, tuple] = OrderedDict() # key -> (expires, tables, value)
+    self.tables:dict[str, set[tuple]] = {} # table -> keys
+    self.lock = threading.Lock()
+    self.hits:int = 0
+    self.misses:int = 0
+
+  def __remove(self, key:tuple):
+    _, tables, _ = self.entries.pop(key)
+    for table in tables:
+      keys = self.tables.get(table)
+      if keys is None: continue
+      keys.discard(key)
+      if not keys: del self.tables[table]
+
+  def get(self, key:tuple) -> tuple[bool, list|None]:
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is not None and entry[0] < time.monotonic():
+        self.__remove(key)
+        entry = None
+      if entry is None:
+        self.misses += 1
+        return False, None
+      self.entries.move_to_end(key)
+      self.hits += 1
+    return True, [row.copy() for row in entry[2]] # caller may modify rows
+
+  def put(self, key:tuple, value:list, tables:set[str], ttl:float|None=None):
+    value = [row.copy() for row in value]
+    with self.lock:
+      if key in self.entries: self.__remove(key)
+      self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), tables, value)
+      for table in tables:
+        self.tables.setdefault(table, set()).add(key)
+      while len(self.entries) > self.max_size:
+        self.__remove(next(iter(self.entries)))
+
+  def invalidate(self, tables:set[str]):
+    with self.lock:
+      for table in tables:
+        for key in list(self.tables.get(table, ())):
+          self.__remove(key)
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+      self.tables.clear()
+
+class PostgresStatementConnection(psycopg2.extensions.connection):
+  statements:StatementCache|None = None
+
+class SqliteStatementConnection(sqlite3.Connection):
+  statements:StatementCache|None = None
+
 # ----------------------------------------------------------------------------- Abstract
 
 class AbstractDatabase:
-  def __init__(self, utc:bool=False):
+  Error = Exception # driver base exception
+  label = "Database"
+  placeholder = "%s" # paramstyle of driver
+  stream_dedicated = True # streaming cursor holds its own connection
+  statement_cache_size = 100 # prepared statements per connection
+  def __init__(self, utc:bool=False, pool_size:int=5):
     self.utc = utc
+    self.pool_size:int = pool_size # 0 - new connection for every query
+    self.pool_min:int = 1
+    self.pool_idle:float = 300
+    self.pool_timeout:float = 30
+    self.pools:dict[str|None, ConnectionPool] = {} # per db_name
+    self.pools_lock = threading.Lock()
+    self.statement_hits:int = 0
+    self.statement_misses:int = 0
+    self.statements_lock = threading.Lock()
+    self.cache:ResultCache|None = None # see enable_cache()
   
   @abstractmethod
-  def conn(self) -> PostgresConnection|MysqlConnection:
+  def conn(self) -> PostgresConnection|MysqlConnection|SqliteConnection:
     pass
+
+  def ping(self, conn) -> bool:
+    return True
+
+  def get_pool(self) -> ConnectionPool:
+    with self.pools_lock:
+      pool = self.pools.get(self.db_name)
+      if pool is None or pool.pid != os.getpid(): # connections are not shared with forked process
+        pool = ConnectionPool(self.conn, self.ping, min(self.pool_min, self.pool_size), self.pool_size,
+          self.pool_idle, timeout=self.pool_timeout)
+        self.pools[self.db_name] = pool
+      return pool
+
+  def close_pool(self, db_name:str|None=None):
+    with self.pools_lock:
+      pools = list(self.pools.values()) if db_name is None else [self.pools.get(db_name)]
+      for pool in pools:
+        if pool: pool.close()
+      if db_name is None: self.pools = {}
+      else: self.pools.pop(db_name, None)
+
+  def close(self):
+    self.close_pool()
+
+  @contextmanager
+  def connection(self, dedicated:bool=False):
+    if not self.pool_size:
+      conn = self.conn()
+      try:
+        yield conn
+      finally:
+        conn.close()
+    else:
+      with self.get_pool().connection(dedicated) as conn:
+        yield conn
   
-  @abstractmethod
-  def exec(self, sql:str) -> bool:
-    pass
+  def enable_cache(self, max_size:int=256, ttl:float=60):
+    # results of read helpers are cached, ttl can be set per query, ttl=0 bypasses cache
+    self.cache = ResultCache(max_size, ttl)
+
+  def disable_cache(self):
+    self.cache = None
+
+  def _Cached(self, kind:tuple, sql:str, params:tuple|list|None, ttl:float|None, load:Callable) -> list:
+    if self.cache is None or ttl == 0: return load()
+    key = (self.db_name, kind, normalize_sql(sql), repr(params))
+    hit, value = self.cache.get(key)
+    if hit: return value
+    value = load()
+    tables = sql_tables(sql)
+    if tables is not None: # with unknown tables entry could not be invalidated
+      self.cache.put(key, value, tables, ttl)
+    return value
+
+  def _Invalidate(self, sqls:list[str]|None=None, table:str|None=None):
+    # write without recognised table clears whole cache
+    if self.cache is None: return
+    tables = { table_name(table) } if table else set()
+    for sql in sqls or []:
+      names = sql_tables(sql)
+      if names is None:
+        tables = set()
+        break
+      tables |= names
+    if tables: self.cache.invalidate(tables)
+    else: self.cache.clear()
+
+  def _Statement(self, conn, sql:str) -> str|None:
+    # name of statement already prepared on connection, counted as hit or miss
+    name = conn.statements.get(sql)
+    with self.statements_lock:
+      if name is None: self.statement_misses += 1
+      else: self.statement_hits += 1
+    return name
+
+  def statement_stats(self) -> dict:
+    total = self.statement_hits + self.statement_misses
+    return {
+      "hits": self.statement_hits,
+      "misses": self.statement_misses,
+      "ratio": self.statement_hits / total if total else 0
+    }
+
+  def execute(self, cur, sql:str, params:tuple|list|None=None):
+    # params are bound by driver, sql uses placeholder of backend
+    if params is None: cur.execute(sql)
+    else: cur.execute(sql, params)
+
+  def exec(self, sql:str, params:tuple|list|None=None) -> bool:
+    if params is None: return self.transaction([sql], "exec")
+    ok = self._Write("exec", self.execute, sql, params)
+    self._Invalidate([sql])
+    return ok
   
-  @abstractmethod
-  def transaction(self, sql:list[str]|str) -> bool:
-    pass
+  def _Write(self, method:str, write:Callable, *args) -> bool:
+    # write(cur, *args) in one transaction, error is printed and rolled back
+    ok = False
+    with self.connection() as conn:
+      cur = conn.cursor()
+      try:
+        write(cur, *args)
+        conn.commit()
+        ok = True
+      except self.Error as error:
+        print(f"{self.label} {method}: {error}")
+        conn.rollback()
+      finally:
+        cur.close()
+    return ok
+
+  def _Execute(self, cur, sqls:list[str]):
+    for sql in sqls:
+      cur.execute(sql)
+
+  def transaction(self, sqls:list[str]|str, method:str="transaction") -> bool:
+    if type(sqls) is str:
+      sqls = split_sql(sqls)
+    ok = self._Write(method, self._Execute, sqls)
+    self._Invalidate(sqls)
+    return ok
   
-  def get_array(self, sql:str) -> list[tuple]:
-    conn = self.conn()
-    cur = conn.cursor()
-    cur.execute(sql)
-    res = tuple_to_list(cur.fetchall())
-    cur.close()
-    conn.close()
+  def get_array(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> list[tuple]:
+    return self._Cached(("array",), sql, params, ttl, lambda: self._GetArray(sql, params))
+
+  def _GetArray(self, sql:str, params:tuple|list|None=None) -> list[tuple]:
+    with self.connection() as conn:
+      cur = conn.cursor()
+      self.execute(cur, sql, params)
+      res = tuple_to_list(cur.fetchall())
+      cur.close()
     return res
   
-  def get_dicts(self, sql:str, names:list[str]|None=None) -> list[dict]:
-    conn = self.conn()
-    cur = conn.cursor()
-    cur.execute(sql)
-    array = tuple_to_list(cur.fetchall())
-    dicts = []
-    names = [column[0] for column in cur.description] if names == None else names
-    for record in array:
-      dicts.append(dict(zip(names,record)))
-    cur.close()
-    conn.close()
+  def get_dicts(self, sql:str, names:list[str]|None=None, params:tuple|list|None=None, ttl:float|None=None) -> list[dict]:
+    kind = ("dicts", tuple(names) if names else None)
+    return self._Cached(kind, sql, params, ttl, lambda: self._GetDicts(sql, names, params))
+
+  def _GetDicts(self, sql:str, names:list[str]|None=None, params:tuple|list|None=None) -> list[dict]:
+    with self.connection() as conn:
+      cur = conn.cursor()
+      self.execute(cur, sql, params)
+      array = tuple_to_list(cur.fetchall())
+      dicts = []
+      names = [column[0] for column in cur.description] if names == None else names
+      for record in array:
+        dicts.append(dict(zip(names,record)))
+      cur.close()
     return dicts
   
-  def get_row(self, sql:str) -> tuple:
-    array = self.get_array(sql)
+  def stream_cursor(self, conn):
+    return conn.cursor()
+
+  def _Stream(self, sql:str, batch_size:int, params:tuple|list|None=None):
+    # (description, rows) batches, connection is held until generator is exhausted or closed
+    with self.connection(self.stream_dedicated) as conn:
+      cur = self.stream_cursor(conn)
+      try:
+        if params is None: cur.execute(sql)
+        else: cur.execute(sql, params) # named cursor cannot run prepared statement
+        first = True
+        while True:
+          rows = cur.fetchmany(batch_size)
+          if not rows:
+            if first and cur.description: yield cur.description, [] # column names of empty result
+            break
+          first = False
+          yield cur.description, rows
+      finally:
+        cur.close()
+
+  def iter_rows(self, sql:str, batch_size:int=1000, params:tuple|list|None=None):
+    # rows one by one as get_array, memory is bound by batch_size
+    for _, rows in self._Stream(sql, batch_size, params):
+      for row in rows:
+        yield list(row)
+
+  def iter_dicts(self, sql:str, batch_size:int=1000, names:list[str]|None=None, params:tuple|list|None=None):
+    for description, rows in self._Stream(sql, batch_size, params):
+      if names is None: names = [column[0] for column in description]
+      for row in rows:
+        yield dict(zip(names, row))
+
+  def column_dtype(self, column:tuple) -> str|None:
+    # NumPy dtype from cursor description, None - inferred from values of each batch
+    return None
+
+  def get_columns(self, sql:str, params:tuple|list|None=None, batch_size:int=10000) -> dict:
+    # {name: NumPy array}, rows are fetched in batches and converted column by column
+    import numpy as np
+    # dtype without driver type is inferred from first non-null values and widened only if later values need it,
+    # so result does not depend on batch_size, batches before it is known are kept as values
+    names, dtypes, inferred, chunks = [], [], [], []
+    for description, rows in self._Stream(sql, batch_size, params):
+      if not names:
+        names = [column[0] for column in description]
+        dtypes = [self.column_dtype(column) for column in description]
+        inferred = [dtype is None for dtype in dtypes]
+        chunks = [[] for _ in names]
+      if not rows: continue
+      for i, values in enumerate(zip(*rows)):
+        if inferred[i]:
+          kind = infer_dtype(values) if any(value is not None for value in values) else None
+          if kind is not None:
+            if dtypes[i] is None:
+              dtypes[i] = kind
+              chunks[i] = [column_array(pending, kind) for pending in chunks[i]]
+            else:
+              dtype = join_dtype(dtypes[i], kind)
+              if dtype == "object" and dtypes[i] != "object": # converted values back, NaN as None
+                chunks[i] = [column_array(tuple(None if value != value else value for value in chunk.tolist()), "object")
+                  for chunk in chunks[i]]
+              dtypes[i] = dtype
+          if dtypes[i] is None:
+            chunks[i].append(values)
+            continue
+        chunks[i].append(column_array(values, dtypes[i]))
+    columns = {}
+    for name, dtype, arrays in zip(names, dtypes, chunks):
+      if dtype is None: arrays = [column_array(values, "object") for values in arrays] # only NULLs
+      if not arrays: columns[name] = np.empty(0, dtype=dtype or "object")
+      elif len(arrays) == 1: columns[name] = arrays[0]
+      else: columns[name] = np.concatenate(arrays)
+    return columns
+
+  def get_frame(self, sql:str, params:tuple|list|None=None, batch_size:int=10000):
+    import pandas as pd
+    return pd.DataFrame(self.get_columns(sql, params, batch_size), copy=False)
+
+  def get_row(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> tuple:
+    array = self.get_array(sql, params, ttl)
     return array[0] if array else None
   
-  def get_dict(self, sql:str) -> dict:
-    dicts = self.get_dicts(sql)
+  def get_dict(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> dict:
+    dicts = self.get_dicts(sql, params=params, ttl=ttl)
     return dicts[0] if dicts else None
   
-  def get_column(self, sql:str) -> tuple:
-    array = self.get_array(sql)
+  def get_column(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> tuple:
+    array = self.get_array(sql, params, ttl)
     if(array):
       column = []
       for row in array:
@@ -77,8 +615,8 @@ class AbstractDatabase:
       return column
     return None
   
-  def get_value(self, sql:str) -> str|None:
-    row = self.get_row(sql)
+  def get_value(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> str|None:
+    row = self.get_row(sql, params, ttl)
     if(row):
       return row[0]
     return None
@@ -110,6 +648,46 @@ class AbstractDatabase:
     else:
       return "'" + html.escape(str(value)) + "'"
   
+  def encode_param(self, value):
+    # types every driver binds are passed as they are, datetime keeps format of encode_insert,
+    # others (Decimal, UUID, numpy scalars...) are sent as text, like str() in encode_insert
+    if isinstance(value, datetime):
+      text = value.replace(tzinfo=None).isoformat(" ", "microseconds") # faster than strftime
+      return text + " UTC" if self.utc else text
+    if value is None or isinstance(value, PARAM_TYPES): return value
+    return str(value)
+
+  def insert_rows_sql(self, table:str, width:int, columns:list[str]|None=None) -> str:
+    names = f" ({','.join(columns)})" if columns else ""
+    return f"INSERT INTO {table}{names} VALUES ({','.join([self.placeholder] * width)});"
+
+  def _InsertMany(self, cur, table:str, batch:list[tuple], columns:list[str]|None):
+    cur.executemany(self.insert_rows_sql(table, len(batch[0]), columns), batch)
+
+  def _InsertRows(self, cur, table:str, rows, columns:list[str]|None, batch_size:int):
+    rows = iter(rows)
+    encode = self.encode_param
+    while True:
+      batch = [tuple(map(encode, row)) for row in itertools.islice(rows, batch_size)]
+      if not batch: break
+      self._InsertMany(cur, table, batch, columns)
+
+  def insert_rows(self, table:str, rows:list[list], columns:list[str]|None=None, batch_size:int=1000) -> bool:
+    # one transaction, rows are bound in batches of batch_size
+    ok = self._Write("insert_rows", self._InsertRows, table, rows, columns, batch_size)
+    self._Invalidate(table=table)
+    return ok
+
+  def _BulkLoad(self, cur, table:str, rows, columns:list[str]|None, batch_size:int):
+    self._InsertRows(cur, table, rows, columns, batch_size)
+
+  def bulk_load(self, table:str, rows, columns:list[str]|None=None, batch_size:int=10000) -> bool:
+    # fastest native path of backend for large imports, rows can be list, generator or pandas DataFrame
+    rows, columns = table_rows(rows, columns)
+    ok = self._Write("bulk_load", self._BulkLoad, table, rows, columns, batch_size)
+    self._Invalidate(table=table)
+    return ok
+
   def insert_row_sql(self, table: str, row:list) -> str:
     row = list(row)
     if not row:
@@ -120,9 +698,10 @@ class AbstractDatabase:
     return sql.rstrip(",") + ");"
   
   def insert_row(self, table: str, row:list) -> bool:
-    return self.exec(self.insert_row_sql(table, row))
+    return self.insert_rows(table, [row])
   
   def insert_array_sql(self, table:str, array:list[list]) -> str:
+    # literal SQL, e.g. for debugging, insert_array binds values
     array = list(array)
     if not array:
       return ""
@@ -133,8 +712,8 @@ class AbstractDatabase:
       sql = sql.rstrip(",") + "),("
     return sql.rstrip("),(") + ");"
   
-  def insert_array(self, table:str, array:list[list]) -> bool:
-    return self.exec(self.insert_array_sql(table, array))
+  def insert_array(self, table:str, array:list[list], batch_size:int=1000) -> bool:
+    return self.insert_rows(table, array, batch_size=batch_size)
   
   def update_row_sql(self, table:str, id:int, array:dict) -> str:
     sql = f"UPDATE {table} SET "
@@ -166,6 +745,7 @@ class AbstractDatabase:
     if not self.database_exist(db_name):
       self.db_name = self.backup
       return False
+    self.close_pool(db_name) # open connections block DROP DATABASE
     sql = f"DROP DATABASE {db_name};"
     self.exec(sql)
     self.db_name = self.backup
@@ -187,69 +767,108 @@ class AbstractDatabase:
 
 # ----------------------------------------------------------------------------- Postgres
 
+POSTGRES_DTYPE = { # type OID -> NumPy dtype
+  16: "bool", 20: "int64", 21: "int16", 23: "int32", 700: "float32", 701: "float64", 1700: "float64",
+  1082: "datetime64[D]", 1114: "datetime64[us]", 1184: "datetime64[us]"
+}
+
+PREPARABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "MERGE", "VALUES"} # statements accepted by PREPARE
+
+def preparable(sql:str, params:tuple|list) -> bool:
+  # tuple is expanded client-side by psycopg2 (IN %s), so it can't be bound to one prepared parameter,
+  # named %(name)s params are not numbered
+  if isinstance(params, Mapping): return False
+  words = sql.split(None, 1)
+  if not words or words[0].upper() not in PREPARABLE: return False
+  return not any(isinstance(value, tuple) for value in params)
+
 class PostgresDatabase(AbstractDatabase):
-  def __init__(self, db_name:str|None, host:str="localhost", user:str="root", password:str="") -> None:
+  Error = psycopg2.Error
+  label = "Postgres"
+  def __init__(self, db_name:str|None, host:str="localhost", user:str="root", password:str="", pool_size:int=5) -> None:
     self.host:str = host
     self.user:str = user
     self.password:str = password
     self.db_name:str|None = db_name
     self.type:DatabaseType = "postgres"
-    super().__init__()
+    super().__init__(pool_size=pool_size)
     
   def conn(self) -> PostgresConnection:
-    conn = psycopg2.connect(host=self.host, user=self.user, password=self.password, dbname=self.db_name)
+    conn = psycopg2.connect(host=self.host, user=self.user, password=self.password, dbname=self.db_name,
+      connection_factory=PostgresStatementConnection)
+    conn.statements = StatementCache(self.statement_cache_size)
     return conn
 
+  def execute(self, cur:PostgresCursor, sql:str, params:tuple|list|None=None):
+    # parameterised query is prepared once per connection, then only EXECUTE is sent
+    if params is None: return cur.execute(sql)
+    if not preparable(sql, params): return cur.execute(sql, params)
+    conn:PostgresStatementConnection = cur.connection
+    name = self._Statement(conn, sql)
+    if name is None:
+      name = f"statement_{next(STATEMENT_ID)}"
+      cur.execute(f"PREPARE {name} AS {numbered_params(sql)}")
+      evicted = conn.statements.add(sql, name)
+      if evicted: cur.execute(f"DEALLOCATE {evicted}")
+    if params: cur.execute(f"EXECUTE {name} ({','.join(['%s'] * len(params))})", params)
+    else: cur.execute(f"EXECUTE {name}")
+
+  def _InsertMany(self, cur:PostgresCursor, table:str, batch:list[tuple], columns:list[str]|None):
+    # many rows in one INSERT statement
+    names = f" ({','.join(columns)})" if columns else ""
+    execute_values(cur, f"INSERT INTO {table}{names} VALUES %s", batch, page_size=len(batch))
+
+  def _BulkLoad(self, cur:PostgresCursor, table:str, rows, columns:list[str]|None, batch_size:int):
+    names = f" ({','.join(columns)})" if columns else ""
+    cur.copy_expert(f"COPY {table}{names} FROM STDIN WITH (FORMAT csv, NULL '\\N')", CsvStream(rows, self.encode_param, batch_size))
+
+  def column_dtype(self, column:tuple) -> str|None:
+    return POSTGRES_DTYPE.get(column[1])
+
+  def stream_cursor(self, conn:PostgresConnection) -> PostgresCursor:
+    # named cursor is server-side, rows are sent as fetched
+    return conn.cursor(name=f"stream_{threading.get_ident()}_{next(STREAM_ID)}")
+
+  def ping(self, conn:PostgresConnection) -> bool:
+    if conn.closed: return False
+    cur = conn.cursor()
+    cur.execute("SELECT 1")
+    cur.close()
+    return True
+
 # ----------------------------------------------------------------------------- MySQL
    
+MYSQL_DTYPE = { # signedness is not in description, so all integers are int64
+  FIELD_TYPE.TINY: "int64", FIELD_TYPE.SHORT: "int64", FIELD_TYPE.INT24: "int64", FIELD_TYPE.LONG: "int64",
+  FIELD_TYPE.LONGLONG: "int64", FIELD_TYPE.YEAR: "int64", FIELD_TYPE.FLOAT: "float32", FIELD_TYPE.DOUBLE: "float64",
+  FIELD_TYPE.DECIMAL: "float64", FIELD_TYPE.NEWDECIMAL: "float64", FIELD_TYPE.DATE: "datetime64[D]",
+  FIELD_TYPE.DATETIME: "datetime64[us]", FIELD_TYPE.TIMESTAMP: "datetime64[us]"
+}
+
 class MysqlDatabase(AbstractDatabase):
-  def __init__(self, db_name:str|None, host:str="localhost", user:str="root", password:str="") -> None:
+  Error = pymysql.Error
+  label = "MYSQL"
+  def __init__(self, db_name:str|None, host:str="localhost", user:str="root", password:str="", pool_size:int=5) -> None:
     self.host:str = host
     self.user:str = user
     self.password:str = password
     self.db_name:str|None = db_name
     self.type:DatabaseType = "mysql"
-    super().__init__()
+    super().__init__(pool_size=pool_size)
     
   def conn(self) -> MysqlConnection:
     conn = pymysql.connect(host=self.host, user=self.user, password=self.password, database=self.db_name)
     return conn
-  
-  def exec(self, sql:str) -> bool:
-    ok = False
-    try:
-      conn = self.conn()
-      cur:MysqlCursor = conn.cursor()
-      cur.execute(sql)
-      conn.commit()
-      ok = True
-    except pymysql.connect.Error as error:
-      print("MYSQL exec: {}".format(error))
-    finally:
-      if conn.ping():
-        cur.close()
-        conn.close()
-    return ok
-  
-  def transaction(self, sqls:list[str]|str) -> bool:
-    if type(sqls) is str:
-      sqls = split_sql(sqls)
-    ok = False
-    try:
-      conn = self.conn()
-      cur:MysqlCursor = conn.cursor()
-      for sql in sqls:
-        cur.execute(sql)
-      conn.commit()
-      ok = True
-    except pymysql.connect.Error as error:
-      print("MYSQL transaction: {}".format(error))
-      conn.rollback()
-    finally:
-      if conn.ping():
-        cur.close()
-        conn.close()
-    return ok
+
+  def column_dtype(self, column:tuple) -> str|None:
+    return MYSQL_DTYPE.get(column[1])
+
+  def stream_cursor(self, conn:MysqlConnection) -> SSCursor:
+    return conn.cursor(SSCursor) # unbuffered
+
+  def ping(self, conn:MysqlConnection) -> bool:
+    conn.ping(reconnect=False)
+    return True
   
   def table_exist(self, name:str) -> bool:
     sql  = f"SELECT 1 FROM information_schema.tables "
@@ -279,50 +898,42 @@ class MysqlDatabase(AbstractDatabase):
 # ----------------------------------------------------------------------------- SQLite
 
 class SqliteDatabase(AbstractDatabase):
-  def __init__(self, db_name:str|None) -> None:
+  Error = sqlite3.Error
+  label = "SQLite"
+  placeholder = "?"
+  stream_dedicated = False # reading connection would lock out writes of the same thread
+  def __init__(self, db_name:str|None, pool_size:int=5) -> None:
     self.db_name:str = db_name
     self.type:DatabaseType = "sqlite"
-    super().__init__()
+    super().__init__(pool_size=pool_size)
 
   def conn(self) -> SqliteConnection:
-    conn = sqlite3.connect(self.db_name)
+    # pooled connection is used by one thread at a time, but not always the same one
+    conn = sqlite3.connect(self.db_name, check_same_thread=not self.pool_size,
+      cached_statements=self.statement_cache_size, factory=SqliteStatementConnection)
+    conn.statements = StatementCache(self.statement_cache_size)
     return conn
-  
-  def exec(self, sql:str) -> bool:
-    ok = False
-    cur = None
-    try:
-      conn = self.conn()
-      cur:SqliteCursor = conn.cursor()
-      cur.execute(sql)
-      conn.commit()
-      ok = True
-    except sqlite3.Error as error:
-      print("SQLite exec: {}".format(error))
-    finally:
-      if cur: cur.close()
-      conn.close()
-    return ok
 
-  def transaction(self, sqls:list[str]|str) -> bool:
-    if type(sqls) is str:
-      sqls = split_sql(sqls)
-    ok = False
-    cur = None
+  def execute(self, cur:SqliteCursor, sql:str, params:tuple|list|None=None):
+    # sqlite3 keeps compiled statements in its own LRU of the same size, it is mirrored for counters
+    if params is None: return cur.execute(sql)
+    conn:SqliteStatementConnection = cur.connection
+    if self._Statement(conn, sql) is None:
+      conn.statements.add(sql, sql)
+    cur.execute(sql, params)
+
+  def _BulkLoad(self, cur:SqliteCursor, table:str, rows, columns:list[str]|None, batch_size:int):
+    # pooled connection keeps pragmas, so they are restored after commit
+    synchronous = cur.execute("PRAGMA synchronous").fetchone()[0]
+    cache_size = cur.execute("PRAGMA cache_size").fetchone()[0]
+    cur.execute("PRAGMA synchronous = OFF")
+    cur.execute("PRAGMA cache_size = -65536") # 64MB
     try:
-      conn = self.conn()
-      cur:SqliteCursor = conn.cursor()
-      for sql in sqls:
-        cur.execute(sql)
-      conn.commit()
-      ok = True
-    except sqlite3.Error as error:
-      print("SQLite transaction: {}".format(error))
-      conn.rollback()
+      self._InsertRows(cur, table, rows, columns, batch_size)
+      cur.connection.commit()
     finally:
-      if cur: cur.close()
-      conn.close()
-    return ok
+      cur.execute(f"PRAGMA synchronous = {synchronous}")
+      cur.execute(f"PRAGMA cache_size = {cache_size}")
 
   def table_exist(self, name:str) -> bool:
     sql = f"SELECT name FROM sqlite_master WHERE type='table' AND name='{name}'"
@@ -340,6 +951,7 @@ class SqliteDatabase(AbstractDatabase):
       db_name = self.db_name
     if db_name is None: return False
     if not self.database_exist(db_name): return False
+    self.close_pool(db_name)
     try:
       os.remove(db_name)
       return True
@@ -362,17 +974,280 @@ class SqliteDatabase(AbstractDatabase):
   def create_database_ifnotexist(self, db_name:str|None=None, set_active:bool = True):
     self.create_database(db_name, set_active)
 
+# ----------------------------------------------------------------------------- Async
+
+"""
+Blocking database calls run in thread executor, so event loop is never stalled,
+queries in flight are limited by workers and connections by pool_size of wrapped database
+"""
+
+class AbstractAsyncDatabase:
+  def __init__(self, db:AbstractDatabase, workers:int|None=None):
+    self.db:AbstractDatabase = db
+    self.executor = ThreadPoolExecutor(workers or db.pool_size or 10, thread_name_prefix="db")
+
+  async def _Run(self, fnc:Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(self.executor, functools.partial(fnc, *args, **kwargs))
+
+  async def get_array(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> list[tuple]:
+    return await self._Run(self.db.get_array, sql, params, ttl)
+
+  async def get_dicts(self, sql:str, names:list[str]|None=None, params:tuple|list|None=None, ttl:float|None=None) -> list[dict]:
+    return await self._Run(self.db.get_dicts, sql, names, params, ttl)
+
+  async def get_row(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> tuple:
+    return await self._Run(self.db.get_row, sql, params, ttl)
+
+  async def get_dict(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> dict:
+    return await self._Run(self.db.get_dict, sql, params, ttl)
+
+  async def get_column(self, sql:str, params:tuple|list|None=None, ttl:float|None=None) -> list:
+    return await self._Run(self.db.get_column, sql, params, ttl)
+
+  async def get_value(self, sql:str, params:tuple|list|None=None, ttl:float|None=None):
+    return await self._Run(self.db.get_value, sql, params, ttl)
+
+  async def exec(self, sql:str, params:tuple|list|None=None) -> bool:
+    return await self._Run(self.db.exec, sql, params)
+
+  async def transaction(self, sqls:list[str]|str) -> bool:
+    return await self._Run(self.db.transaction, sqls)
+
+  async def insert_row(self, table:str, row:list) -> bool:
+    return await self._Run(self.db.insert_row, table, row)
+
+  async def insert_rows(self, table:str, rows:list[list], columns:list[str]|None=None, batch_size:int=1000) -> bool:
+    return await self._Run(self.db.insert_rows, table, rows, columns, batch_size)
+
+  async def insert_array(self, table:str, array:list[list], batch_size:int=1000) -> bool:
+    return await self._Run(self.db.insert_array, table, array, batch_size)
+
+  async def update_row(self, table:str, id:int, array:dict) -> bool:
+    return await self._Run(self.db.update_row, table, id, array)
+
+  async def bulk_load(self, table:str, rows, columns:list[str]|None=None, batch_size:int=10000) -> bool:
+    return await self._Run(self.db.bulk_load, table, rows, columns, batch_size)
+
+  async def get_columns(self, sql:str, params:tuple|list|None=None, batch_size:int=10000) -> dict:
+    return await self._Run(self.db.get_columns, sql, params, batch_size)
+
+  async def get_frame(self, sql:str, params:tuple|list|None=None, batch_size:int=10000):
+    return await self._Run(self.db.get_frame, sql, params, batch_size)
+
+  async def _Stream(self, sql:str, batch_size:int, params:tuple|list|None):
+    # generator holds cursor and connection, so all its steps run in one own thread
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(1, thread_name_prefix="db-stream")
+    batches = self.db._Stream(sql, batch_size, params)
+    try:
+      while True:
+        batch = await loop.run_in_executor(executor, next, batches, None)
+        if batch is None: break
+        yield batch
+    finally:
+      await loop.run_in_executor(executor, batches.close)
+      executor.shutdown(wait=False)
+
+  async def iter_rows(self, sql:str, batch_size:int=1000, params:tuple|list|None=None):
+    async for _, rows in self._Stream(sql, batch_size, params):
+      for row in rows:
+        yield list(row)
+
+  async def iter_dicts(self, sql:str, batch_size:int=1000, names:list[str]|None=None, params:tuple|list|None=None):
+    async for description, rows in self._Stream(sql, batch_size, params):
+      if names is None: names = [column[0] for column in description]
+      for row in rows:
+        yield dict(zip(names, row))
+
+  async def close(self):
+    await self._Run(self.db.close)
+    self.executor.shutdown(wait=False)
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, *args):
+    await self.close()
+
+class AsyncPostgresDatabase(AbstractAsyncDatabase):
+  def __init__(self, db_name:str|None, host:str="localhost", user:str="root", password:str="", pool_size:int=5, workers:int|None=None) -> None:
+    super().__init__(PostgresDatabase(db_name, host, user, password, pool_size), workers)
+
+class AsyncMysqlDatabase(AbstractAsyncDatabase):
+  def __init__(self, db_name:str|None, host:str="localhost", user:str="root", password:str="", pool_size:int=5, workers:int|None=None) -> None:
+    super().__init__(MysqlDatabase(db_name, host, user, password, pool_size), workers)
+
+class AsyncSqliteDatabase(AbstractAsyncDatabase):
+  def __init__(self, db_name:str|None, pool_size:int=5, workers:int|None=None) -> None:
+    super().__init__(SqliteDatabase(db_name, pool_size), workers)
+
+# ----------------------------------------------------------------------------- Writer
+
+"""
+Rows are queued and inserted by background thread as one transaction when max_rows, max_bytes
+or interval since first buffered row is reached, full queue blocks write() (back-pressure),
+failed batches are kept in order and retried after retry_delay, over max_failed the oldest is dropped,
+not closed writer is closed at interpreter exit, so buffered rows are flushed
+"""
+
+class FlushRequest:
+  def __init__(self):
+    self.done = threading.Event()
+    self.ok:bool = False
+
+def row_size(row:list) -> int:
+  # rough size, without walking objects
+  return sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in row)
+
+class BufferedWriter:
+  def __init__(
+    self,
+    db:AbstractDatabase,
+    table:str,
+    columns:list[str]|None=None,
+    max_rows:int=1000,
+    max_bytes:int=1 << 20,
+    interval:float=1, # [s]
+    queue_size:int=10000,
+    retry_delay:float=5, # [s]
+    max_failed:int=100 # batches
+  ):
+    self.db:AbstractDatabase = db
+    self.table:str = table
+    self.columns:list[str]|None = columns
+    self.max_rows:int = max_rows
+    self.max_bytes:int = max_bytes
+    self.interval:float = interval
+    self.retry_delay:float = retry_delay
+    self.max_failed:int = max_failed
+    self.queue = queue.Queue(queue_size)
+    self.failed:deque[list] = deque() # batches waiting for retry
+    self.retry_at:float = 0
+    self.written:int = 0
+    self.dropped:int = 0
+    self.closed:bool = False
+    self.thread = threading.Thread(target=self.__run, name=f"db-writer-{table}", daemon=True)
+    self.thread.start()
+    atexit.register(self.close)
+
+  def write(self, row:list, timeout:float|None=None):
+    if self.closed:
+      raise Exception(f"BufferedWriter of {self.table} is closed")
+    self.queue.put(row, timeout=timeout)
+
+  def write_many(self, rows:list[list], timeout:float|None=None):
+    for row in rows:
+      self.write(row, timeout)
+
+  def flush(self, timeout:float|None=None) -> bool:
+    # waits until rows written so far are flushed, failed batches are retried at once,
+    # True only if all of them are stored
+    if self.closed:
+      raise Exception(f"BufferedWriter of {self.table} is closed")
+    request = FlushRequest()
+    self.queue.put(request)
+    return request.done.wait(timeout) and request.ok
+
+  def close(self, timeout:float|None=None):
+    # remaining rows are flushed, batches still failing stay in self.failed
+    if self.closed: return
+    self.closed = True
+    atexit.unregister(self.close)
+    self.queue.put(None)
+    self.thread.join(timeout)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def __insert(self, batch:list) -> bool:
+    try:
+      return self.db.insert_rows(self.table, batch, self.columns, self.max_rows)
+    except Exception as error: # e.g. pool timeout, thread must survive
+      print(f"BufferedWriter {self.table}: {error}")
+      return False
+
+  def __retry(self) -> bool:
+    while self.failed:
+      if not self.__insert(self.failed[0]):
+        self.retry_at = time.monotonic() + self.retry_delay
+        return False
+      self.written += len(self.failed.popleft())
+    return True
+
+  def __flush(self, rows:list, force:bool=False):
+    if self.failed:
+      ok = self.__retry() if force or time.monotonic() >= self.retry_at else False
+    else:
+      ok = True
+    if not rows: return
+    if ok and self.__insert(rows):
+      self.written += len(rows)
+      return
+    if ok: self.retry_at = time.monotonic() + self.retry_delay
+    self.failed.append(rows) # after older failed batches, order is kept
+    while len(self.failed) > self.max_failed:
+      batch = self.failed.popleft()
+      self.dropped += len(batch)
+      print(f"BufferedWriter {self.table}: {len(batch)} rows dropped")
+
+  def __run(self):
+    rows, size, deadline = [], 0, None
+    while True:
+      wakeup = [moment for moment in (deadline, self.retry_at if self.failed else None) if moment is not None]
+      timeout = max(0, min(wakeup) - time.monotonic()) if wakeup else None
+      try:
+        item = self.queue.get(timeout=timeout)
+      except queue.Empty:
+        pass
+      else:
+        if item is None: # close
+          self.__flush(rows, True)
+          return
+        if isinstance(item, FlushRequest):
+          self.__flush(rows, True)
+          rows, size, deadline = [], 0, None
+          item.ok = not self.failed
+          item.done.set()
+          continue
+        rows.append(item)
+        size += row_size(item)
+        if deadline is None: deadline = time.monotonic() + self.interval
+      if rows and (len(rows) >= self.max_rows or size >= self.max_bytes or time.monotonic() >= deadline):
+        self.__flush(rows)
+        rows, size, deadline = [], 0, None
+      elif self.failed and time.monotonic() >= self.retry_at:
+        self.__retry()
+
 # ----------------------------------------------------------------------------- Any
 
-def Database(type:DatabaseType, db_name:str|None, host:str="localhost", user:str="root", password:str="") -> MysqlConnection|PostgresConnection|SqliteDatabase|None:
+def Database(type:DatabaseType, db_name:str|None, host:str="localhost", user:str="root", password:str="", pool_size:int=5) -> MysqlConnection|PostgresConnection|SqliteDatabase|None:
   if type == "postgres":
     from db import PostgresDatabase
-    return PostgresDatabase(db_name, host, user, password)
+    return PostgresDatabase(db_name, host, user, password, pool_size)
   elif type == "mysql":
     from db import MysqlDatabase
-    return MysqlDatabase(db_name, host, user, password)
+    return MysqlDatabase(db_name, host, user, password, pool_size)
   elif type == "sqlite":
     from db import SqliteDatabase
-    return SqliteDatabase(db_name)
+    return SqliteDatabase(db_name, pool_size)
   else:
-    return None
\ No newline at end of file
+    return None
+
+def AsyncDatabase(type:DatabaseType, db_name:str|None, host:str="localhost", user:str="root", password:str="", pool_size:int=5, workers:int|None=None) -> AbstractAsyncDatabase|None:
+  if type == "postgres":
+    return AsyncPostgresDatabase(db_name, host, user, password, pool_size, workers)
+  elif type == "mysql":
+    return AsyncMysqlDatabase(db_name, host, user, password, pool_size, workers)
+  elif type == "sqlite":
+    return AsyncSqliteDatabase(db_name, pool_size, workers)
+  else:
+    return None
+
+if __name__ == "__main__":
+  # COPY text of bulk_load in Postgres, bytea column as hex
+  rows = [[1, "a,b", None, b"\x00ab"], [2, "", datetime(2024, 1, 2, 3, 4, 5), memoryview(b"\xff")]]
+  print(CsvStream(rows, PostgresDatabase(None).encode_param).read())
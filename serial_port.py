@@ -167,14 +167,14 @@ class SerialPort():
   def flush(self):
     self.serial.flush()
     
-  def send(self, message:str|bytes, str_color=Color.SEND, bytes_color=Color.DATA):
+  def send(self, message:str|bytes|bytearray|memoryview, str_color=Color.SEND, bytes_color=Color.DATA):
     self.clear()
     if type(message) is str:
       self.print(f"{str_color}{message.strip()}{Color.END}")
       data = bytes(message, "utf-8")
     else:
-      data = message
-      self.print(f"{bytes_color}{data}{Color.END}")
+      data = message # also reusable bytearray/memoryview from encode_into()
+      self.print(f"{bytes_color}{bytes(data)}{Color.END}")
     if self.address is not None:
       data = bytes([self.address]) + data
     self.serial.write(data)